@@ -0,0 +1,60 @@
+import numpy as np
+
+
+def group_by(columns: dict, by: list, values=('time', 'iterations'), percentiles=(('median', 50), ('p95', 95))) -> dict:
+    """
+    Groups benchmark rows by the given config columns and computes the number of rows and the mean and percentiles
+    of the value columns per group. Every column is scanned once, the percentiles need one sort per value column.
+    Rows with a nan value (e.g. failed runs) are not counted for the statistics of this value.
+    Usage:
+        groups = group_by(load_csv('csv/benchmark_8_selection.csv'), ['selection_method'])
+        groups[('roulette',)]['time_mean']
+    :param columns: dict, column name -> np.ndarray, see results_store.load_csv and ResultsStore.load
+    :param by: list of column names
+    :param values: column names of the aggregated values
+    :param percentiles: tuples (name, percentile), percentiles in [0, 100] with linear interpolation like np.percentile
+    :return: dict, tuple of the values of the by columns -> dict with 'count' (number of rows) and for every value
+             column f'{value}_count', f'{value}_mean' and f'{value}_{name}' for every percentile
+    """
+    number_of_rows = len(next(iter(columns.values()))) if columns else 0
+    if number_of_rows == 0:
+        return {}
+    # one integer code per row and by column, combined into one group id per row
+    uniques, codes = [], []
+    for name in by:
+        unique, code = np.unique(columns[name], return_inverse=True)
+        uniques.append(unique)
+        codes.append(code.ravel())
+    shape = [len(unique) for unique in uniques]
+    combined = np.ravel_multi_index(codes, shape) if by else np.zeros(number_of_rows, dtype=int)
+    group_codes, groups = np.unique(combined, return_inverse=True)
+    groups = groups.ravel()
+    number_of_groups = len(group_codes)
+    statistics = {'count': np.bincount(groups, minlength=number_of_groups)}
+
+    for value in values:
+        data = np.asarray(columns[value], dtype=float)
+        valid = ~np.isnan(data)
+        data, value_groups = data[valid], groups[valid]
+        counts = np.bincount(value_groups, minlength=number_of_groups)
+        sums = np.bincount(value_groups, weights=data, minlength=number_of_groups)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            statistics[f'{value}_mean'] = sums / counts
+        statistics[f'{value}_count'] = counts
+        # sorted by group and within a group by value, i.e. every group is a sorted slice
+        data = data[np.lexsort((data, value_groups))]
+        starts = np.cumsum(counts) - counts
+        for name, percentile in percentiles:
+            position = starts + percentile / 100 * np.maximum(counts - 1, 0)
+            lower = np.floor(position).astype(int)
+            upper = np.ceil(position).astype(int)
+            result = np.full(number_of_groups, np.nan)
+            has_values = counts > 0
+            lower, upper, position = lower[has_values], upper[has_values], position[has_values]
+            result[has_values] = data[lower] + (data[upper] - data[lower]) * (position - lower)
+            statistics[f'{value}_{name}'] = result
+
+    indices = np.unravel_index(group_codes, shape) if by else ()
+    keys = zip(*(unique[index].tolist() for unique, index in zip(uniques, indices))) if by else [()] * number_of_groups
+    return {tuple(key): {name: column[group].item() for name, column in statistics.items()}
+            for group, key in enumerate(keys)}
@@ -4,138 +4,95 @@
 #
 #######################
 
-import csv
-import pygal
 import sys
 
+import numpy as np
+import pygal
+
+from aggregate import group_by
+from results_store import load_csv
+
 n = 8
 key = 'time'
 my_type = 'Tournament'
 
+# my_type -> (grouped column, bar values of the column, x labels, title, name of the series)
+chart_types = {
+    'Crossover': ('crossover_method', ['random', 'pmx', 'order_based', 'position_based'], None,
+                  'Crossover Methods', 'Crossover Method'),
+    'Mutation': ('mutation_method', ['random', 'exchange', 'scramble', 'insertion', 'inversion', 'displacement',
+                                     'displacement_inversion'], None, 'Mutation Methods', 'Mutation Method'),
+    'Selection': ('selection_method', ['random', 'tournament', 'truncation', 'roulette'], None,
+                  'Selection Methods', 'Selection Method'),
+    'Truncation': ('truncation_threshold', [0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9], None,
+                   'Truncation Thresholds', 'Truncation Threshold'),
+    'Tournament': ('tournament_competitors', [3, 5, 10, 15, 20, 25, 30, 40], None,
+                   'Tournament Competitors', 'Tournament Competitors'),
+    'Size': ('selection_method', ['truncation', 'roulette'], ['Tournament', 'Roulette'], 'Roulette vs Truncation', ''),
+}
+
+
+def averages(groups: dict, values: list, key: str, statistic='mean') -> list:
+    """
+    Looks up a statistic of the groups of group_by with one grouped column
+    :param groups: return value of aggregate.group_by
+    :param values: values of the grouped column
+    :param key: 'time' or 'iterations'
+    :param statistic: 'mean', 'median' or 'p95'
+    :return: list, None for values without rows
+    """
+    return [groups[(value,)][f'{key}_{statistic}'] if (value,) in groups else None for value in values]
+
 
 def plot(n, key, my_type):
-    if n == 8:
-        runs = 500
-    else:
-        runs = 100
+    if my_type not in chart_types:
+        print('ERROR!')
+        sys.exit(1)
+    column, values, x_labels, title, series = chart_types[my_type]
 
     if key == 'time':
         y_title = 'Average Running Time in Seconds'
     else:
         y_title = 'Average Number of Iterations'
 
-    with open(f'csv/benchmark_{n}_{my_type.lower()}.csv', 'r') as f:
-        csv_f = csv.DictReader(f, delimiter='|')
-        my_list = []
-        for row in csv_f:
-            my_list.append(row)
-
-        # my_list = sorted(my_list, key=lambda x: x['time'], reverse=True)
-
-    # crossover
-    random_crossover = sum([float(x[key]) for i, x in enumerate(my_list) if x['crossover_method'] == 'random']) / runs
-    pmx = sum([float(x[key]) for i, x in enumerate(my_list) if x['crossover_method'] == 'pmx']) / runs
-    order_based = sum([float(x[key]) for i, x in enumerate(my_list) if x['crossover_method'] == 'order_based']) / runs
-    position_based = sum(
-        [float(x[key]) for i, x in enumerate(my_list) if x['crossover_method'] == 'position_based']) / runs
-
-    # selection
-    random_selection = sum([float(x[key]) for i, x in enumerate(my_list) if x['selection_method'] == 'random']) / runs
-    roulette = sum([float(x[key]) for i, x in enumerate(my_list) if x['selection_method'] == 'roulette']) / runs
-    tournament = sum([float(x[key]) for i, x in enumerate(my_list) if x['selection_method'] == 'tournament']) / runs
-    truncation = sum([float(x[key]) for i, x in enumerate(my_list) if x['selection_method'] == 'truncation']) / runs
-
-    truncation01 = sum([float(x[key]) for i, x in enumerate(my_list) if x['truncation_threshold'] == '0.1']) / runs
-    truncation02 = sum([float(x[key]) for i, x in enumerate(my_list) if x['truncation_threshold'] == '0.2']) / runs
-    truncation03 = sum([float(x[key]) for i, x in enumerate(my_list) if x['truncation_threshold'] == '0.3']) / runs
-    truncation04 = sum([float(x[key]) for i, x in enumerate(my_list) if x['truncation_threshold'] == '0.4']) / runs
-    truncation05 = sum([float(x[key]) for i, x in enumerate(my_list) if x['truncation_threshold'] == '0.5']) / runs
-    truncation06 = sum([float(x[key]) for i, x in enumerate(my_list) if x['truncation_threshold'] == '0.6']) / runs
-    truncation07 = sum([float(x[key]) for i, x in enumerate(my_list) if x['truncation_threshold'] == '0.7']) / runs
-    truncation08 = sum([float(x[key]) for i, x in enumerate(my_list) if x['truncation_threshold'] == '0.8']) / runs
-    truncation09 = sum([float(x[key]) for i, x in enumerate(my_list) if x['truncation_threshold'] == '0.9']) / runs
-
-    tournament3 = sum([float(x[key]) for i, x in enumerate(my_list) if x['tournament_competitors'] == '3']) / runs
-    tournament5 = sum([float(x[key]) for i, x in enumerate(my_list) if x['tournament_competitors'] == '5']) / runs
-    tournament10 = sum([float(x[key]) for i, x in enumerate(my_list) if x['tournament_competitors'] == '10']) / runs
-    tournament15 = sum([float(x[key]) for i, x in enumerate(my_list) if x['tournament_competitors'] == '15']) / runs
-    tournament20 = sum([float(x[key]) for i, x in enumerate(my_list) if x['tournament_competitors'] == '20']) / runs
-    tournament25 = sum([float(x[key]) for i, x in enumerate(my_list) if x['tournament_competitors'] == '25']) / runs
-    tournament30 = sum([float(x[key]) for i, x in enumerate(my_list) if x['tournament_competitors'] == '30']) / runs
-    tournament40 = sum([float(x[key]) for i, x in enumerate(my_list) if x['tournament_competitors'] == '40']) / runs
-
-    if my_type == 'Size' and n <= 30:
-        runs = 40
-    elif my_type == 'Size' and n > 30:
-        runs = 10
-    size_roulette = sum([float(x[key]) for i, x in enumerate(my_list) if x['selection_method'] == 'roulette']) / runs
-    size_truncation = sum([float(x[key]) for i, x in enumerate(my_list) if x['selection_method'] == 'truncation']) / runs
-
-    # mutation
-    random_mutation = sum([float(x[key]) for i, x in enumerate(my_list) if x['mutation_method'] == 'random']) / runs
-    exchange = sum([float(x[key]) for i, x in enumerate(my_list) if x['mutation_method'] == 'exchange']) / runs
-    scramble = sum([float(x[key]) for i, x in enumerate(my_list) if x['mutation_method'] == 'scramble']) / runs
-    insertion = sum([float(x[key]) for i, x in enumerate(my_list) if x['mutation_method'] == 'insertion']) / runs
-    inversion = sum([float(x[key]) for i, x in enumerate(my_list) if x['mutation_method'] == 'inversion']) / runs
-    displacement = sum([float(x[key]) for i, x in enumerate(my_list) if x['mutation_method'] == 'displacement']) / runs
-    displacement_inversion = sum(
-        [float(x[key]) for i, x in enumerate(my_list) if x['mutation_method'] == 'displacement_inversion']) / runs
-
-    too_slow = [i for i, x in enumerate(my_list) if x['iterations'] == '10000']
-
-    my_chart = pygal.Bar(show_legend=False, x_label_rotation=20, y_title=y_title)
-    my_chart.title = f'{my_type} Methods for the {n}-Queens Problem'
-
-    if my_type == 'Crossover':
-        my_chart.x_labels = ['random', 'pmx', 'order_based', 'position_based']
-        my_chart.add(f'{my_type} Method', [random_crossover, pmx, order_based, position_based])
-    elif my_type == 'Mutation':
-        my_chart.x_labels = ['random', 'exchange', 'scramble', 'insertion', 'inversion', 'displacement',
-                             'displacement_inversion']
-        my_chart.add('Mutation Method',
-                     [random_mutation, exchange, scramble, insertion, inversion, displacement, displacement_inversion])
-    elif my_type == 'Selection':
-        my_chart.x_labels = ['random', 'tournament', 'truncation', 'roulette']
-        my_chart.add('Selection Method', [random_selection, tournament, truncation, roulette])
-    elif my_type == 'Truncation':
-        my_chart = pygal.Bar(show_legend=False, y_title=y_title)
-        my_chart.title = f'{my_type} Thresholds for the {n}-Queens Problem'
-        my_chart.x_labels = ['0.1', '0.2', '0.3', '0.4', '0.5', '0.6', '0.7', '0.8', '0.9']
-        my_chart.add('Truncation Threshold',
-                     [truncation01, truncation02, truncation03, truncation04, truncation05, truncation06, truncation07,
-                      truncation08, truncation09])
-    elif my_type == 'Tournament':
-        my_chart = pygal.Bar(show_legend=False, y_title=y_title)
-        my_chart.title = f'{my_type} Competitors for the {n}-Queens Problem'
-        my_chart.x_labels = [3, 5, 10, 15, 20, 25, 30, 40]
-        my_chart.add('Tournament Competitors',
-                     [tournament3, tournament5, tournament10, tournament15, tournament20, tournament25, tournament30,
-                      tournament40])
-    elif my_type == 'Size':
-        if n> 30:
-            return size_truncation
+    # the averages divide by the number of matching rows, i.e. they stay correct if runs are missing
+    groups = group_by(load_csv(f'csv/benchmark_{n}_{my_type.lower()}.csv'), [column])
+
+    if my_type == 'Size':
         my_chart = pygal.Bar(show_legend=True, legend_at_bottom=True, y_title=y_title)
-        my_chart.title = f'Roulette vs Truncation'
-        my_chart.x_labels = ['Tournament', 'Roulette']
-        # return [size_roulette, size_roulette_adaptfalse, size_truncation, size_truncation_adaptfalse]
-        my_chart.add(f'', [size_truncation, size_roulette])
+        my_chart.title = title
+    elif my_type in ('Truncation', 'Tournament'):
+        my_chart = pygal.Bar(show_legend=False, y_title=y_title)
+        my_chart.title = f'{title} for the {n}-Queens Problem'
     else:
-        print('ERROR!')
-        sys.exit(1)
+        my_chart = pygal.Bar(show_legend=False, x_label_rotation=20, y_title=y_title)
+        my_chart.title = f'{title} for the {n}-Queens Problem'
+    my_chart.x_labels = x_labels if x_labels is not None else [str(value) for value in values]
+    my_chart.add(series, averages(groups, values, key))
 
     # my_chart.render_to_file(f'images/{my_type.lower()}_{n}_{key}.svg')
     my_chart.render_to_png(f'images/{my_type.lower()}_{n}_{key}.png')
     # my_chart.render_in_browser()
 
 
+def growth(field_sizes: list, key='time', selection_method='truncation') -> list:
+    """
+    Average of key per field size, all size benchmarks are grouped in one pass
+    :param field_sizes: list of n
+    :param key: 'time' or 'iterations'
+    :param selection_method: only runs with this selection method
+    :return: list, one average per field size
+    """
+    columns = [load_csv(f'csv/benchmark_{field_size}_size.csv') for field_size in field_sizes]
+    names = [name for name in columns[0] if all(name in part for part in columns)]
+    groups = group_by({name: np.concatenate([part[name] for part in columns]) for name in names},
+                      ['field_size', 'selection_method'], values=[key])
+    return [groups[(field_size, selection_method)][f'{key}_mean'] if (field_size, selection_method) in groups
+            else None for field_size in field_sizes]
+
+
 my_chart = pygal.Bar(show_legend=False, x_label_rotation=0, y_title='Average Running Time in Seconds')
 my_chart.title = f'Computational Growth'
 my_chart.x_labels = [40, 50, 60, 70, 80, 90, 100]
-foo = []
-for n in [40, 50, 60, 70, 80, 90, 100]:
-    for key in ['time']:
-        for my_type in ['Size']:
-            foo.append(plot(n, key, my_type))
-
-my_chart.add(f'', foo)
+my_chart.add(f'', growth([40, 50, 60, 70, 80, 90, 100], 'time'))
 my_chart.render_to_png(f'images/size_time.png')
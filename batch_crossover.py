@@ -0,0 +1,200 @@
+from typing import Tuple
+import numpy as np
+
+from ga_config import GAConfig, global_rng
+
+
+def inverse_permutations(genotypes: np.ndarray) -> np.ndarray:
+    """
+    Computes the inverse permutation of every row, i.e. the position of every value in its genotype.
+    Replaces list(genotype).index(value) scans by a lookup: inverse[row, value] = position
+    :param genotypes: np.ndarray of shape (k, n), every row is a permutation
+    :return: np.ndarray of shape (k, n)
+    """
+    number, size = genotypes.shape
+    inverse = np.empty_like(genotypes)
+    inverse[np.arange(number)[:, np.newaxis], genotypes] = np.arange(size)
+    return inverse
+
+
+def random_points(number: int, size: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Chooses a random number (between 1 and n-1) of random points per row,
+    like rng.integers(1, n) followed by a shuffled np.arange(n) cut to that length
+    :param number: number of rows
+    :param size: n
+    :param rng: np.random.Generator
+    :return: boolean np.ndarray of shape (number, size), True for chosen points
+    """
+    number_of_points_to_choose = rng.integers(1, size, number)
+    # the rank of a random key is a random permutation, take the points with the lowest ranks
+    ranks = np.argsort(np.argsort(rng.random((number, size)), axis=1), axis=1)
+    return ranks < number_of_points_to_choose[:, np.newaxis]
+
+
+def crossover_batch(genotypes: np.ndarray, parent_indices: np.ndarray, method=None,
+                    ga_config: GAConfig = None, rng: np.random.Generator = None) -> Tuple:
+    """
+    Batched version of Organism.crossover: produces the children of all given parent pairs at once.
+    If a random value is higher than the crossover probability the parents are copied without any crossover.
+    :param genotypes: np.ndarray of shape (population size, n)
+    :param parent_indices: np.ndarray of shape (k, 2), rows of the two parents of every pair
+    :param method: 'pmx', 'order_based', 'position_based' or 'random', if None ga_config.crossover_method is used
+    :param ga_config: GAConfig of the run, if None it is created from config.py
+    :param rng: np.random.Generator of the run, if None the shared global generator is used
+    :return: two np.ndarrays of shape (k, n), the first and the second children of every pair
+    """
+    ga_config = ga_config if ga_config is not None else GAConfig.from_config()
+    rng = rng if rng is not None else global_rng
+    method = method if method else ga_config.crossover_method
+    parents1 = genotypes[parent_indices[:, 0]]
+    parents2 = genotypes[parent_indices[:, 1]]
+    children1, children2 = parents1.copy(), parents2.copy()
+    # pairs with a random value higher than the crossover probability keep the parents
+    crossover_pairs = np.flatnonzero(rng.random(len(parent_indices)) <= ga_config.crossover_probability)
+
+    if method == 'random':
+        method_list = ga_config.crossover_method_list
+        methods = rng.integers(0, len(method_list), len(crossover_pairs))
+        pairs_per_method = [(method_list[i], crossover_pairs[methods == i]) for i in range(len(method_list))]
+    else:
+        pairs_per_method = [(method, crossover_pairs)]
+
+    for pair_method, pairs in pairs_per_method:
+        if len(pairs) == 0:
+            continue
+        if pair_method == 'pmx':
+            operator = pmx_crossover_batch
+        elif pair_method == 'order_based':
+            operator = order_based_crossover_batch
+        elif pair_method == 'position_based':
+            operator = position_based_crossover_batch
+        else:
+            raise ValueError(f'Unknown crossover method {pair_method}')
+        children1[pairs], children2[pairs] = operator(parents1[pairs], parents2[pairs], rng)
+    return children1, children2
+
+
+def pmx_crossover_batch(parents1: np.ndarray, parents2: np.ndarray,
+                        rng: np.random.Generator = None) -> Tuple:
+    """
+    Batched partially mapped crossover, see Organism.pmx_crossover
+    :param parents1: np.ndarray of shape (k, n)
+    :param parents2: np.ndarray of shape (k, n)
+    :param rng: np.random.Generator, if None the shared global generator is used
+    :return: two np.ndarrays of shape (k, n)
+    """
+    rng = rng if rng is not None else global_rng
+    number, size = parents1.shape
+    cxpoints = np.sort(rng.integers(0, size, (number, 2)), axis=1)
+    return pmx_children(parents1, parents2, cxpoints[:, 0], cxpoints[:, 1] + 1)
+
+
+def pmx_children(parents1: np.ndarray, parents2: np.ndarray, begin: np.ndarray, end: np.ndarray) -> Tuple:
+    """
+    Partially mapped crossover with given segments [begin, end) per pair.
+    Every child gets the segment of its first parent, the other positions are taken from the second parent.
+    If such a value already occurs in the segment it is mapped, via the segment, to the value of the second parent at
+    the position of the value in the first parent, until it does not occur in the segment anymore.
+    :param parents1: np.ndarray of shape (k, n)
+    :param parents2: np.ndarray of shape (k, n)
+    :param begin: np.ndarray of shape (k,), first index of the segments
+    :param end: np.ndarray of shape (k,), index after the segments
+    :return: two np.ndarrays of shape (k, n)
+    """
+    number, size = parents1.shape
+    positions = np.arange(size)
+    in_segment = (positions >= begin[:, np.newaxis]) & (positions < end[:, np.newaxis])
+    inverse1 = inverse_permutations(parents1)
+    inverse2 = inverse_permutations(parents2)
+    return (_pmx_child(parents1, parents2, inverse1, in_segment),
+            _pmx_child(parents2, parents1, inverse2, in_segment))
+
+
+def _pmx_child(parents1, parents2, inverse1, in_segment) -> np.ndarray:
+    """
+    Computes the first child of pmx_children, for the second child the parents are swapped
+    """
+    rows = np.arange(len(parents1))[:, np.newaxis]
+    child = np.where(in_segment, parents1, parents2)
+    # positions outside the segment whose value is already used by the segment
+    conflicts = ~in_segment & in_segment[rows, inverse1[rows, child]]
+    while conflicts.any():
+        conflict_rows, conflict_positions = np.nonzero(conflicts)
+        values = child[conflict_rows, conflict_positions]
+        child[conflict_rows, conflict_positions] = parents2[conflict_rows, inverse1[conflict_rows, values]]
+        conflicts[conflict_rows, conflict_positions] = in_segment[
+            conflict_rows, inverse1[conflict_rows, child[conflict_rows, conflict_positions]]]
+    return child
+
+
+def order_based_crossover_batch(parents1: np.ndarray, parents2: np.ndarray,
+                                rng: np.random.Generator = None) -> Tuple:
+    """
+    Batched order-based crossover, see Organism.order_based_crossover
+    :param parents1: np.ndarray of shape (k, n)
+    :param parents2: np.ndarray of shape (k, n)
+    :param rng: np.random.Generator, if None the shared global generator is used
+    :return: two np.ndarrays of shape (k, n)
+    """
+    rng = rng if rng is not None else global_rng
+    number, size = parents1.shape
+    return order_based_children(parents1, parents2, random_points(number, size, rng))
+
+
+def order_based_children(parents1: np.ndarray, parents2: np.ndarray, points: np.ndarray) -> Tuple:
+    """
+    Order-based crossover with given points per pair.
+    The first child is a copy of the second parent where the values at the points of the first parent
+    are rearranged into the order they have in the first parent. For the second child the parents are swapped.
+    :param parents1: np.ndarray of shape (k, n)
+    :param parents2: np.ndarray of shape (k, n)
+    :param points: boolean np.ndarray of shape (k, n)
+    :return: two np.ndarrays of shape (k, n)
+    """
+    rows = np.arange(len(parents1))[:, np.newaxis]
+    inverse1 = inverse_permutations(parents1)
+    inverse2 = inverse_permutations(parents2)
+    child1 = parents2.copy()
+    child2 = parents1.copy()
+    # boolean indexing is row-major, i.e. per row the order of the positions is kept
+    child1[points[rows, inverse1[rows, parents2]]] = parents1[points]
+    child2[points[rows, inverse2[rows, parents1]]] = parents2[points]
+    return child1, child2
+
+
+def position_based_crossover_batch(parents1: np.ndarray, parents2: np.ndarray,
+                                   rng: np.random.Generator = None) -> Tuple:
+    """
+    Batched position-based crossover, see Organism.position_based_crossover
+    :param parents1: np.ndarray of shape (k, n)
+    :param parents2: np.ndarray of shape (k, n)
+    :param rng: np.random.Generator, if None the shared global generator is used
+    :return: two np.ndarrays of shape (k, n)
+    """
+    rng = rng if rng is not None else global_rng
+    number, size = parents1.shape
+    return position_based_children(parents1, parents2, random_points(number, size, rng))
+
+
+def position_based_children(parents1: np.ndarray, parents2: np.ndarray, points: np.ndarray) -> Tuple:
+    """
+    Position-based crossover with given points per pair.
+    The first child keeps the values of the first parent at the points, the remaining positions are filled
+    sequentially with the remaining values of the second parent. For the second child the parents are swapped.
+    :param parents1: np.ndarray of shape (k, n)
+    :param parents2: np.ndarray of shape (k, n)
+    :param points: boolean np.ndarray of shape (k, n)
+    :return: two np.ndarrays of shape (k, n)
+    """
+    rows = np.arange(len(parents1))[:, np.newaxis]
+    inverse1 = inverse_permutations(parents1)
+    inverse2 = inverse_permutations(parents2)
+    child1 = np.empty_like(parents1)
+    child2 = np.empty_like(parents2)
+    child1[points] = parents1[points]
+    child2[points] = parents2[points]
+    # boolean indexing is row-major, i.e. per row the order of the remaining values is kept
+    child1[~points] = parents2[~points[rows, inverse1[rows, parents2]]]
+    child2[~points] = parents1[~points[rows, inverse2[rows, parents1]]]
+    return child1, child2
@@ -0,0 +1,157 @@
+import numpy as np
+
+from ga_config import GAConfig, global_rng
+
+
+def mutate_batch(genotypes: np.ndarray, mask: np.ndarray, method=None, ga_config: GAConfig = None,
+                 rng: np.random.Generator = None) -> np.ndarray:
+    """
+    Batched version of Organism.mutate: mutates all rows selected by mask in place.
+    Every mutation is expressed as a remapping of positions, i.e. child[j] = genotype[source[j]],
+    such that all selected rows are mutated with a few array operations and without any per-row reallocation.
+    Possible methods:   'exchange', 'scramble', 'displacement', 'insertion', 'inversion',
+                        'displacement_inversion' and 'random', see Organism.mutate
+    :param genotypes: np.ndarray of shape (population size, n), changed in place
+    :param mask: boolean np.ndarray of shape (population size,), True for the rows to mutate
+    :param method: one of the methods above, if None ga_config.mutation_method is used
+    :param ga_config: GAConfig of the run, if None it is created from config.py
+    :param rng: np.random.Generator of the run, if None the shared global generator is used
+    :return: np.ndarray, indices of the mutated rows
+    """
+    ga_config = ga_config if ga_config is not None else GAConfig.from_config()
+    rng = rng if rng is not None else global_rng
+    method = method if method else ga_config.mutation_method
+    rows = np.flatnonzero(mask)
+    if method == 'random':
+        method_list = ga_config.mutation_method_list
+        methods = rng.integers(0, len(method_list), len(rows))
+        rows_per_method = [(method_list[i], rows[methods == i]) for i in range(len(method_list))]
+    else:
+        rows_per_method = [(method, rows)]
+
+    size = genotypes.shape[1]
+    for row_method, method_rows in rows_per_method:
+        if len(method_rows) == 0:
+            continue
+        if row_method == 'exchange':
+            source = exchange_sources(len(method_rows), size, rng)
+        elif row_method == 'scramble':
+            source = scramble_sources(len(method_rows), size, rng)
+        elif row_method == 'displacement':
+            source = displacement_sources(len(method_rows), size, rng, invert=False)
+        elif row_method == 'insertion':
+            source = insertion_sources(len(method_rows), size, rng)
+        elif row_method == 'inversion':
+            source = inversion_sources(len(method_rows), size, rng)
+        elif row_method == 'displacement_inversion':
+            source = displacement_sources(len(method_rows), size, rng, invert=True)
+        else:
+            raise ValueError(f'Unknown mutation method {row_method}')
+        genotypes[method_rows] = np.take_along_axis(genotypes[method_rows], source, axis=1)
+    return rows
+
+
+def random_segments(number: int, size: int, rng: np.random.Generator):
+    """
+    Draws two random integers per row, the lower is the start, the greater is the end of the segment
+    :param number: number of rows
+    :param size: n
+    :param rng: np.random.Generator
+    :return: two np.ndarrays of shape (number, 1), begin and end of the segments
+    """
+    begin_and_end = np.sort(rng.integers(0, size, (number, 2)), axis=1)
+    return begin_and_end[:, :1], begin_and_end[:, 1:]
+
+
+def exchange_sources(number: int, size: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Exchange Mutation: select two rows randomly and exchange them, see Organism.exchange_mutation
+    :param number: number of rows
+    :param size: n
+    :param rng: np.random.Generator
+    :return: np.ndarray of shape (number, size), source positions
+    """
+    rows = np.arange(number)
+    row1 = rng.integers(0, size, number)
+    row2 = rng.integers(0, size, number)
+    source = np.tile(np.arange(size), (number, 1))
+    source[rows, row1] = row2
+    source[rows, row2] = row1
+    return source
+
+
+def scramble_sources(number: int, size: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Scramble Mutation: shuffle a random segment, see Organism.scramble_mutation
+    Positions outside of the segment keep their index as sort key, positions in the segment [begin, end) get a
+    random key in [begin, end), hence sorting the keys only shuffles the segment.
+    :param number: number of rows
+    :param size: n
+    :param rng: np.random.Generator
+    :return: np.ndarray of shape (number, size), source positions
+    """
+    begin, end = random_segments(number, size, rng)
+    positions = np.arange(size)
+    in_segment = (positions >= begin) & (positions < end)
+    keys = np.where(in_segment, begin + rng.random((number, size)) * (end - begin), positions)
+    return np.argsort(keys, axis=1, kind='stable')
+
+
+def displacement_sources(number: int, size: int, rng: np.random.Generator, invert=False) -> np.ndarray:
+    """
+    Displacement Mutation: move a random segment to a random position, see Organism.displacement_mutation
+    If invert is True the segment is also flipped, see Organism.displacement_inversion_mutation
+    :param number: number of rows
+    :param size: n
+    :param rng: np.random.Generator
+    :param invert: bool
+    :return: np.ndarray of shape (number, size), source positions
+    """
+    begin, end = random_segments(number, size, rng)
+    # get new insertion position
+    new_position = rng.integers(0, size - (end - begin))
+    return _segment_move_sources(size, begin, end, new_position, invert)
+
+
+def insertion_sources(number: int, size: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Insertion Mutation: move one element to another random position, see Organism.insertion_mutation
+    :param number: number of rows
+    :param size: n
+    :param rng: np.random.Generator
+    :return: np.ndarray of shape (number, size), source positions
+    """
+    from_index = rng.integers(0, size, (number, 1))
+    to_index = rng.integers(0, size - 1, (number, 1))  # one less because we temporarily remove one element
+    return _segment_move_sources(size, from_index, from_index + 1, to_index, invert=False)
+
+
+def _segment_move_sources(size, begin, end, new_position, invert) -> np.ndarray:
+    """
+    Source positions for deleting the segment [begin, end) and inserting it again at new_position
+    """
+    positions = np.arange(size)
+    length = end - begin
+    in_new_segment = (positions >= new_position) & (positions < new_position + length)
+    if invert:
+        segment_source = end - 1 - (positions - new_position)
+    else:
+        segment_source = begin + (positions - new_position)
+    # index in the genotype without the segment, shifted back behind the segment
+    rest = np.where(positions < new_position, positions, positions - length)
+    rest_source = np.where(rest < begin, rest, rest + length)
+    return np.where(in_new_segment, segment_source, rest_source)
+
+
+def inversion_sources(number: int, size: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Inversion Mutation: invert/flip a random segment, see Organism.inversion_mutation
+    :param number: number of rows
+    :param size: n
+    :param rng: np.random.Generator
+    :return: np.ndarray of shape (number, size), source positions
+    """
+    begin, end = random_segments(number, size, rng)
+    positions = np.arange(size)
+    in_segment = (positions >= begin) & (positions < end)
+    return np.where(in_segment, begin + end - 1 - positions, positions)
@@ -0,0 +1,29 @@
+#######################
+#
+#   This script is only used for benchmarking the fitness evaluation
+#   per Organism vs. one batched call for a whole generation
+#
+#######################
+
+import timeit
+
+import numpy as np
+
+import fitness
+
+repeats = 5
+field_sizes = [8, 40, 100]
+number_of_organisms = [100, 500, 1000]
+
+print(f'{"n":>5} {"population":>10} {"per organism [ms]":>18} {"batched [ms]":>13} {"speedup":>8}')
+for field_size in field_sizes:
+    for population_size in number_of_organisms:
+        # one random permutation per row, like a generation of children
+        genotypes = np.argsort(np.random.random((population_size, field_size)), axis=1)
+
+        per_organism = min(timeit.repeat(lambda: [fitness.compute_fitness(x, field_size) for x in genotypes],
+                                         number=1, repeat=repeats))
+        batched = min(timeit.repeat(lambda: fitness.compute_fitness_batch(genotypes, field_size),
+                                    number=1, repeat=repeats))
+        print(f'{field_size:>5} {population_size:>10} {per_organism * 1000:>18.3f} {batched * 1000:>13.3f} '
+              f'{per_organism / batched:>8.1f}')
@@ -0,0 +1,25 @@
+#######################
+#
+#   This script is only used for benchmarking the time-to-solution of the island model
+#   with one worker process vs. one worker process per island
+#
+#######################
+
+import os
+
+from ga_config import GAConfig
+from islands import run_islands
+
+runs = 5
+ga_config = GAConfig.from_config(verbose=False, field_size=40, number_of_islands=os.cpu_count())
+
+print(f'{"workers":>8} {"islands":>8} {"average time [s]":>17} {"solved":>7}')
+for island_workers in sorted({1, os.cpu_count()}):
+    setting = ga_config._replace(island_workers=island_workers)
+    times = []
+    solved = 0
+    for _ in range(runs):
+        iterations, time, fitness, average_fitness, island_statistics = run_islands(setting)
+        times.append(time)
+        solved += any(x['solved'] for x in island_statistics)
+    print(f'{setting.island_workers:>8} {setting.number_of_islands:>8} {sum(times) / runs:>17.3f} {solved:>4}/{runs}')
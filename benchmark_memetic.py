@@ -0,0 +1,25 @@
+#######################
+#
+#   This script is only used for benchmarking the plain genetic algorithm
+#   vs. the memetic mode (min-conflicts local search of the fittest children, see local_search.py)
+#
+#######################
+
+from ga_config import GAConfig
+from main import main
+
+runs = 3
+field_sizes = [8, 20, 40, 100, 200, 500, 1000]
+max_iterations = 200  # cap of the plain runs, the memetic runs need only a few generations
+
+print(f'{"n":>5} {"mode":>8} {"average iterations":>19} {"average time [s]":>17} {"solved":>7}')
+for field_size in field_sizes:
+    for memetic in (False, True):
+        ga_config = GAConfig.from_config(field_size=field_size, memetic=memetic, engine='vectorized',
+                                         max_iterations=max_iterations, verbose=False)
+        results = [main(ga_config) for _ in range(runs)]
+        iterations = sum(x[0] for x in results) / runs
+        time = sum(x[1] for x in results) / runs
+        solved = sum(x[2] == ga_config.max_fitness for x in results)
+        print(f'{field_size:>5} {"memetic" if memetic else "plain":>8} {iterations:>19.1f} {time:>17.3f} '
+              f'{solved:>4}/{runs}')
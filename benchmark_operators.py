@@ -0,0 +1,216 @@
+#######################
+#
+#   Micro-benchmarks of every operator of organism.py and population.py (and their batched versions)
+#   for several field and population sizes.
+#   The results are written as json together with a fingerprint of the environment
+#   and can be compared against a saved baseline to find regressions.
+#
+#   usage: python benchmark_operators.py [--output results/benchmark_operators.json]
+#                                        [--baseline baseline.json] [--threshold 0.2]
+#
+#######################
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import timeit
+
+import numpy as np
+
+from batch_crossover import crossover_batch
+from batch_mutation import mutate_batch
+from ga_config import GAConfig
+from organism import Organism
+from population import Population, ArrayPopulation
+import fitness
+
+field_sizes = [8, 40, 100, 1000]
+population_sizes = [100, 1000]
+repeats = 5
+min_time = 0.02  # minimal time in seconds of one repeat, the number of calls per repeat is chosen accordingly
+seed = 0  # seed of the random inputs, such that all runs benchmark the same populations
+
+crossover_methods = ['pmx', 'order_based', 'position_based']
+mutation_methods = ['exchange', 'scramble', 'displacement', 'insertion', 'inversion', 'displacement_inversion',
+                    'random']
+selection_methods = ['random', 'tournament', 'truncation', 'roulette']
+
+
+def environment() -> dict:
+    """
+    Fingerprint of the environment, results are only comparable within the same environment
+    :return: dict
+    """
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+            'processor': platform.processor(),
+            'cpu_count': os.cpu_count(),
+            'commit': commit}
+
+
+def measure(function, setup=None) -> float:
+    """
+    Measures the time of one call, i.e. the minimum over all repeats of the time per call
+    :param function: function without arguments
+    :param setup: function without arguments which is called before every call of function, e.g. to undo its
+                  effect, its time is measured separately and subtracted
+    :return: float, seconds per call
+    """
+    if setup is not None:
+        return max(0.0, measure(lambda: (setup(), function())) - measure(setup))
+    timer = timeit.Timer(function)
+    number = 1
+    while timer.timeit(number) < min_time:
+        number *= 2
+    return min(timer.repeat(repeat=repeats, number=number)) / number
+
+
+def organism_benchmarks(field_size: int) -> dict:
+    """
+    Benchmarks of the operators of a single Organism
+    :param field_size: n
+    :return: dict, operator -> seconds per call
+    """
+    ga_config = GAConfig.from_config(field_size=field_size, verbose=False)
+    parent1 = Organism(ga_config=ga_config)
+    parent2 = Organism(ga_config=ga_config)
+    # evaluated, such that the mutations update the fitness incrementally
+    parent1.compute_fitness()
+    results = {'compute_fitness': measure(lambda: fitness.compute_fitness(parent1.genotype, field_size)),
+               'organism.compute_fitness': measure(parent1.compute_fitness)}
+    for method in crossover_methods:
+        operator = getattr(parent1, f'{method}_crossover')
+        results[f'crossover.{method}'] = measure(lambda: operator(parent2))
+    for method in mutation_methods:
+        results[f'mutation.{method}'] = measure(lambda: parent1.mutate(method))
+    return results
+
+
+def population_benchmarks(field_size: int, population_size: int) -> dict:
+    """
+    Benchmarks of the selection methods and of the batched operators of a whole generation
+    :param field_size: n
+    :param population_size: number of Organisms
+    :return: dict, operator -> seconds per call
+    """
+    ga_config = GAConfig.from_config(field_size=field_size, number_of_organisms=population_size, verbose=False)
+    rng = np.random.default_rng(seed)
+    population = Population(size=population_size, ga_config=ga_config, rng=rng)
+    array_population = ArrayPopulation(size=population_size, ga_config=ga_config, rng=rng)
+    genotypes = array_population.genotypes.copy()
+    parent_indices = rng.integers(0, population_size, (population_size // 2, 2))
+
+    # the populations are evaluated and sorted on creation, i.e. the setups undo it before every call
+    def reset_fitness():
+        for organism in population.population:
+            organism._fitness = None
+
+    def reset_array_fitness():
+        array_population.fitness[:] = np.nan
+
+    def shuffle():
+        rng.shuffle(population.population)
+
+    def shuffle_array():
+        order = rng.permutation(population_size)
+        array_population.genotypes = array_population.genotypes[order]
+        array_population.fitness = array_population.fitness[order]
+
+    results = {'compute_fitness_batch': measure(lambda: fitness.compute_fitness_batch(genotypes, field_size)),
+               'population.evaluate': measure(population.evaluate, reset_fitness),
+               'array_population.evaluate': measure(array_population.evaluate, reset_array_fitness),
+               'population.sort': measure(population.sort, shuffle),
+               'array_population.sort': measure(array_population.sort, shuffle_array)}
+    # the selections expect evaluated and sorted populations again
+    for my_population in (population, array_population):
+        my_population.evaluate()
+        my_population.sort()
+    for method in selection_methods:
+        results[f'selection.{method}'] = measure(lambda: population.select_parent(method))
+        results[f'selection_batch.{method}'] = measure(lambda: array_population.select_parents(population_size,
+                                                                                               method))
+    for method in crossover_methods:
+        results[f'crossover_batch.{method}'] = measure(
+            lambda: crossover_batch(genotypes, parent_indices, method, ga_config._replace(crossover_probability=1)))
+    mask = np.ones(population_size, dtype=bool)
+    for method in mutation_methods:
+        results[f'mutation_batch.{method}'] = measure(lambda: mutate_batch(genotypes, mask, method, ga_config))
+    return results
+
+
+def run() -> dict:
+    """
+    Runs all benchmarks
+    :return: dict, 'environment' and 'results' (benchmark name -> seconds per call)
+    """
+    results = {}
+    for field_size in field_sizes:
+        for name, seconds in organism_benchmarks(field_size).items():
+            results[f'{name}[n={field_size}]'] = seconds
+        for population_size in population_sizes:
+            for name, seconds in population_benchmarks(field_size, population_size).items():
+                results[f'{name}[n={field_size},population={population_size}]'] = seconds
+        print(f'n={field_size} done', file=sys.stderr)
+    return {'environment': environment(), 'created': time.strftime('%Y-%m-%dT%H:%M:%S'), 'results': results}
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    """
+    Compares the results with a baseline
+    :param current: dict, see run
+    :param baseline: dict, see run
+    :param threshold: relative slowdown which counts as regression, e.g. 0.2 for 20%
+    :return: list of (benchmark name, baseline seconds, current seconds) of all regressions
+    """
+    differences = {key: (baseline['environment'].get(key), value)
+                   for key, value in current['environment'].items()
+                   if key != 'commit' and baseline['environment'].get(key) != value}
+    for key, (old, new) in differences.items():
+        print(f'Warning: environment differs from the baseline, {key}: {old} -> {new}')
+    regressions = []
+    for name, seconds in current['results'].items():
+        baseline_seconds = baseline['results'].get(name)
+        if baseline_seconds is not None and seconds > baseline_seconds * (1 + threshold):
+            regressions.append((name, baseline_seconds, seconds))
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Micro-benchmarks of the genetic operators')
+    parser.add_argument('--output', default='results/benchmark_operators.json', help='json file for the results')
+    parser.add_argument('--baseline', help='json file of an earlier run, the results are compared with it')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='relative slowdown which counts as regression (default 0.2, i.e. 20%%)')
+    args = parser.parse_args()
+
+    current = run()
+    if os.path.dirname(args.output):
+        os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(current, f, indent=2)
+    print(f'{"benchmark":<60} {"time per call [us]":>19}')
+    for name, seconds in current['results'].items():
+        print(f'{name:<60} {seconds * 1e6:>19.2f}')
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold)
+        for name, baseline_seconds, seconds in regressions:
+            print(f'Regression: {name} {baseline_seconds * 1e6:.2f}us -> {seconds * 1e6:.2f}us '
+                  f'(+{(seconds / baseline_seconds - 1) * 100:.0f}%)')
+        if regressions:
+            sys.exit(1)
+        print(f'No regressions (threshold {args.threshold * 100:.0f}%)')
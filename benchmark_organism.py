@@ -0,0 +1,76 @@
+#######################
+#
+#   This script is only used for benchmarking the memory per Organism
+#   and the construction time with and without validation
+#
+#######################
+
+import timeit
+import tracemalloc
+
+import numpy as np
+
+from ga_config import GAConfig
+from organism import Organism
+import fitness
+
+repeats = 5
+number = 10000
+field_sizes = [8, 40, 100]
+
+
+class DictOrganism:
+    """
+    Standalone class without __slots__ which sets the same attributes as Organism, i.e. every instance has
+    a per-instance dict, for comparison only.
+    (A subclass of Organism would not do: the inherited slot descriptors would still hold all attributes.)
+    """
+
+    def __init__(self, genotype, fitness_value, ga_config):
+        self.genotype = genotype
+        self._fitness = fitness_value
+        self.ga_config = ga_config
+        self.fitness_cache = None
+        self.columns = self.diagonals = self.anti_diagonals = None
+        self.shared = False
+        self.rng = None
+
+    @classmethod
+    def from_genotype(cls, genotype: np.ndarray, fitness_value: float, ga_config: GAConfig):
+        return cls(genotype, fitness_value, ga_config)
+
+
+def memory_per_organism(organism_class, genotypes, ga_config) -> float:
+    """
+    Measures the memory of the Organism objects themselves, the genotypes (row views) are allocated beforehand
+    :return: bytes per Organism
+    """
+    genotypes = list(genotypes)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    organisms = [organism_class.from_genotype(genotype, 0.0, ga_config) for genotype in genotypes]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del organisms
+    return (after - before) / len(genotypes)
+
+
+print(f'{"n":>5} {"validated [us]":>15} {"unvalidated [us]":>17} {"from_genotype [us]":>19} '
+      f'{"slots [B]":>10} {"dict [B]":>9}')
+for field_size in field_sizes:
+    ga_config = GAConfig.from_config(field_size=field_size)
+    # one shared buffer, every Organism is a view into one row
+    genotypes = np.argsort(np.random.random((number, field_size)), axis=1)
+    fitness_value = fitness.max_fitness(field_size)
+
+    def construct(validate):
+        for genotype in genotypes:
+            Organism(genotype, ga_config, validate=validate)
+
+    validated = min(timeit.repeat(lambda: construct(True), number=1, repeat=repeats)) / number
+    unvalidated = min(timeit.repeat(lambda: construct(False), number=1, repeat=repeats)) / number
+    views = min(timeit.repeat(lambda: [Organism.from_genotype(x, fitness_value, ga_config) for x in genotypes],
+                              number=1, repeat=repeats)) / number
+    print(f'{field_size:>5} {validated * 1e6:>15.2f} {unvalidated * 1e6:>17.2f} {views * 1e6:>19.2f} '
+          f'{memory_per_organism(Organism, genotypes, ga_config):>10.0f} '
+          f'{memory_per_organism(DictOrganism, genotypes, ga_config):>9.0f}')
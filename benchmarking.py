@@ -4,10 +4,8 @@
 #
 #######################
 
-import csv
-
-import config
-from main import main
+from results_store import ResultsStore
+from sweep import run_sweep
 
 runs = 10
 field_sizes = [40]
@@ -29,44 +27,25 @@ mutation_methods = [
 mutation_probabilities = [0.3]  # [0.001, 0.01, 0.1, 0.2, 0.3]
 adapt_mutabilities = [True]  # [False, True]
 
-benchmark_list = []
-counter = 0
-for config.field_size in field_sizes:
-    benchmark_list = []
-    print(f'Field Sizes: {config.field_size}')
-    for config.number_of_organisms in number_of_organisms:
-        print(f'Population Size: {config.number_of_organisms}')
-        for config.selection_method in selection_methods:
-            for config.copy_threshold in copy_thresholds:
-                for config.crossover_method in crossover_methods:
-                    for config.tournament_competitors in tournament_competitors:
-                        for config.truncation_threshold in truncation_thresholds:
-                            for config.crossover_probability in crossover_probabilities:
-                                for config.mutation_method in mutation_methods:
-                                    for config.mutation_probability in mutation_probabilities:
-                                        for config.adapt_mutability in adapt_mutabilities:
-                                            for _ in range(runs):
-                                                counter += 1
-                                                print(counter)
-                                                current_row = {}
-                                                iterations, time, fitness, average_fitness = main()
-                                                current_row['field_size'] = config.field_size
-                                                current_row['population_size'] = config.number_of_organisms
-                                                current_row['selection_method'] = config.selection_method
-                                                current_row['tournament_competitors'] = config.tournament_competitors
-                                                current_row['truncation_threshold'] = config.truncation_threshold
-                                                current_row['copy_threshold'] = config.copy_threshold
-                                                current_row['crossover_method'] = config.crossover_method
-                                                current_row['crossover_probability'] = config.crossover_probability
-                                                current_row['mutation_method'] = config.mutation_method
-                                                current_row['mutation_probability'] = config.mutation_probability
-                                                current_row['adapt_mutability'] = config.adapt_mutability
-                                                current_row['iterations'] = iterations
-                                                current_row['time'] = time
-                                                current_row['fitness'] = fitness
-                                                current_row['average_fitness'] = average_fitness
-                                                benchmark_list.append(current_row)
-    with open(f'csv/benchmark_{config.field_size}_size.csv', 'w') as f:
-        csv_f = csv.DictWriter(f, delimiter='|', fieldnames=benchmark_list[0].keys())
-        csv_f.writeheader()
-        csv_f.writerows(benchmark_list)
+# PROFILING, adds the time and number of calls per phase to the csv files
+profile_phases = [True]
+
+grid = {'field_size': field_sizes,
+        'number_of_organisms': number_of_organisms,
+        'selection_method': selection_methods,
+        'copy_threshold': copy_thresholds,
+        'crossover_method': crossover_methods,
+        'tournament_competitors': tournament_competitors,
+        'truncation_threshold': truncation_thresholds,
+        'crossover_probability': crossover_probabilities,
+        'mutation_method': mutation_methods,
+        'mutation_probability': mutation_probabilities,
+        'adapt_mutability': adapt_mutabilities,
+        'profile_phases': profile_phases}
+
+if __name__ == '__main__':
+    # every run is an independent job in a process pool, the results are appended to
+    # results/benchmark_size.ndjson as the jobs finish
+    sweep = run_sweep(grid, runs, path='results/benchmark_size.ndjson')
+    # legacy layout for analyze.py: csv/benchmark_{field_size}_size.csv, only the runs of this sweep
+    ResultsStore('results/benchmark_size.ndjson').export_csv('csv/benchmark_{field_size}_size.csv', sweep=sweep)
@@ -4,6 +4,10 @@
 field_size = 8  # determines the field size nxn and the therefore the number of queens, the problem should be solvable for n>3
 number_of_organisms = 100  # number of individuals, i.e. population size
 max_iterations = 10000  # number of iteration at which the algorithm will stop and give up, it will still output a fittest but not optimal solution
+seed = None  # seed of the random generator of a run, None draws a random one (it is recorded in the benchmark csv files)
+engine = 'classic'  # possible options: 'classic' (loop over pairs of children), 'vectorized' (see engine.py)
+fitness_cache_size = 0  # number of cached fitness values (least recently used are evicted), 0 disables the cache
+population_backend = 'list'  # possible options: 'list' (list of Organisms), 'array' (one 2D numpy array for the whole population)
 
 # SELECTION PARAMETERS
 selection_method = 'truncation'  # possible options: 'random', 'tournament', 'truncation', 'roulette'
@@ -25,7 +29,46 @@ mutation_method_list = ['exchange', 'scramble', 'displacement', 'insertion', 'in
                         'displacement_inversion']  # used for 'random' mutation method therefore without 'random'
 
 
+# LOCAL SEARCH PARAMETERS (memetic mode, see local_search.py)
+memetic = False  # if True the fittest children of every generation are improved by a min-conflicts local search
+local_search_intensity = 1.0  # probability that the local search is done in a generation
+local_search_top_k = 5  # number of the fittest children which are improved
+local_search_steps = 50  # maximal number of min-conflicts steps (swaps) per child
+
+# CONVERGENCE PARAMETERS (see convergence.py)
+convergence_action = None  # possible options: None (run until max_iterations), 'stop', 'restart', 'immigrants'
+diversity_threshold = 0.05  # the population converged if the ratio of unique genotypes is lower
+stagnation_window = 1000  # the population converged if the fittest fitness did not improve for this many generations
+immigrant_fraction = 0.5  # fraction of the least fit Organisms which are replaced by random ones for 'immigrants'
+
+# ISLAND MODEL PARAMETERS (see islands.py)
+number_of_islands = 4  # number of independent sub-populations, each of size number_of_organisms
+island_workers = None  # number of worker processes, None uses all cores
+migration_interval = 50  # number of generations between two migrations
+migration_size = 2  # number of the fittest Organisms which migrate to every neighbour
+migration_topology = 'ring'  # possible options: 'ring', 'fully_connected', 'random'
+
 # verbose should be set to True if you want to print to the terminal,
 # otherwise it will only return the iterations, running time, the fittest individual and the average fitness
 # for further processing, we only used False for benchmarking
 verbose = True
+
+# profile_phases measures the time and number of calls per phase of a generation (selection, crossover, ...),
+# main returns them as a dict and the benchmark csv files get one time and one calls column per phase
+profile_phases = False
+# profile_dump is None or a directory, to which a cProfile dump (pstats) of every run of main is written
+profile_dump = None
+
+# telemetry is a list of sinks which get the best and mean fitness, diversity, mutation probability and wall time
+# of every generation (see telemetry.py), possible options: 'jsonl' (appended to telemetry_path), 'console'
+telemetry = []
+telemetry_path = 'results/telemetry.jsonl'
+telemetry_batch_size = 100  # number of generations which are emitted to the sinks at once
+
+# validate_genotypes should only be set to True for debugging,
+# it checks that every child of a crossover is a valid permutation
+validate_genotypes = False
+
+# debug_fitness should only be set to True for debugging,
+# it cross-checks every incremental fitness update of a mutation against a full recomputation
+debug_fitness = False
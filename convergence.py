@@ -0,0 +1,89 @@
+from functools import lru_cache
+
+import numpy as np
+
+from ga_config import GAConfig
+
+
+@lru_cache(maxsize=None)
+def hash_weights(field_size: int) -> np.ndarray:
+    """
+    Fixed random weights for hashing genotypes of the given length, see diversity
+    :param field_size: int, n
+    :return: int64 np.ndarray of shape (n,)
+    """
+    return np.random.default_rng(field_size).integers(1, 2 ** 62, field_size, dtype=np.int64)
+
+
+def diversity(genotypes: np.ndarray) -> float:
+    """
+    Ratio of unique genotypes in a population, 1 if all genotypes differ, 1/size if all are the same.
+    Every genotype is hashed to one integer with random weights (the products wrap around), then only the
+    hashes are compared, i.e. there is no sorting or comparison of whole rows.
+    :param genotypes: np.ndarray of shape (size, n)
+    :return: float
+    """
+    if len(genotypes) == 0:
+        return 1.0
+    with np.errstate(over='ignore'):
+        hashes = genotypes.astype(np.int64) @ hash_weights(genotypes.shape[1])
+    return len(np.unique(hashes)) / len(genotypes)
+
+
+class ConvergenceMonitor:
+    """
+    Detects if a run converged, i.e. if the ratio of unique genotypes fell below ga_config.diversity_threshold
+    or the fitness of the fittest Organism did not improve for ga_config.stagnation_window generations.
+    Then the configured convergence_action is done:
+        'stop': stop the run
+        'restart': replace all Organisms but the fittest one by random ones
+        'immigrants': replace the least fit immigrant_fraction of the population by random Organisms
+    """
+
+    def __init__(self, ga_config: GAConfig):
+        """
+        :param ga_config: GAConfig of the run
+        """
+        self.ga_config = ga_config
+        self.best_fitness = None
+        self.last_improvement = 0
+        self.generation = 0
+        self.number_of_actions = 0
+
+    def converged(self, population) -> bool:
+        """
+        Updates the monitor with the (sorted) population of the next generation
+        :param population: Population or ArrayPopulation
+        :return: True if the population converged or stagnated
+        """
+        self.generation += 1
+        best_fitness = population.max_fitness_value()
+        if self.best_fitness is None or best_fitness > self.best_fitness:
+            self.best_fitness = best_fitness
+            self.last_improvement = self.generation
+        if self.generation - self.last_improvement >= self.ga_config.stagnation_window:
+            return True
+        return diversity(population.genotype_array()) < self.ga_config.diversity_threshold
+
+    def check(self, population) -> bool:
+        """
+        Checks the population of the next generation and does the convergence action if it converged,
+        restarts and immigrants change the population in place
+        :param population: Population or ArrayPopulation, sorted
+        :return: True if the run should stop
+        """
+        if not self.converged(population):
+            return False
+        self.number_of_actions += 1
+        action = self.ga_config.convergence_action
+        if action == 'stop':
+            return True
+        elif action == 'restart':
+            population.replace_worst(population.size() - 1)
+        elif action == 'immigrants':
+            population.replace_worst(int(population.size() * self.ga_config.immigrant_fraction))
+        else:
+            raise ValueError(f'Unknown convergence action {action}')
+        # the new Organisms get a whole stagnation window
+        self.last_improvement = self.generation
+        return False
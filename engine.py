@@ -0,0 +1,232 @@
+from typing import Tuple
+
+import numpy as np
+
+from batch_crossover import crossover_batch
+from batch_mutation import mutate_batch
+from population import ArrayPopulation
+from ga_config import GAConfig
+import fitness
+import local_search
+from convergence import ConvergenceMonitor
+from profiling import NULL_TIMER
+from telemetry import NULL_TELEMETRY
+
+
+def next_generation(my_population: ArrayPopulation, number_of_copies: int, number_of_pairs: int,
+                    mutation_probability: float, timer=NULL_TIMER) -> ArrayPopulation:
+    """
+    Computes the next generation of a sorted ArrayPopulation with a fixed pipeline of array operations
+    :param my_population: ArrayPopulation, sorted
+    :param number_of_copies: number of the fittest Organisms which are copied to the next generation
+    :param number_of_pairs: number of pairs of children
+    :param mutation_probability: current (maybe adapted) mutation probability
+    :param timer: profiling.PhaseTimer which accumulates the time per phase
+    :return: ArrayPopulation, the next generation, sorted
+    """
+    ga_config = my_population.ga_config
+    field_size = ga_config.field_size
+    rng = my_population.rng
+    ### SELECTION ###
+    start = timer.start()
+    parents = my_population.select_parents(2 * number_of_pairs, method=ga_config.selection_method)
+    genotypes = my_population.genotypes[:my_population.size()]
+    timer.stop('selection', start)
+
+    ### CROSSOVER ###
+    start = timer.start()
+    children1, children2 = crossover_batch(genotypes, parents.reshape(-1, 2), method=ga_config.crossover_method,
+                                           ga_config=ga_config, rng=rng)
+    # interleave the children like the pairs of children in main.main
+    children = np.stack((children1, children2), axis=1).reshape(-1, field_size)
+    timer.stop('crossover', start)
+
+    ### MUTATION ###
+    start = timer.start()
+    mutate_batch(children, rng.random(len(children)) < mutation_probability,
+                 method=ga_config.mutation_method, ga_config=ga_config, rng=rng)
+    timer.stop('mutation', start)
+
+    ### NEXT GENERATION ###
+    # score all children with one batched call
+    start = timer.start()
+    fitness_cache = my_population.fitness_cache
+    compute_fitness_batch = (fitness_cache.compute_fitness_batch if fitness_cache is not None
+                             else fitness.compute_fitness_batch)
+    children_fitness = compute_fitness_batch(children, field_size)
+    timer.stop('fitness', start)
+    # copy the fittest Organisms
+    start = timer.start()
+    new_population = ArrayPopulation.from_arrays(
+        np.concatenate((genotypes[:number_of_copies], children)),
+        np.concatenate((my_population.fitness[:number_of_copies], children_fitness)),
+        ga_config, sort=False, fitness_cache=fitness_cache, rng=rng)
+    timer.stop('population', start)
+    if ga_config.memetic:
+        # improve the fittest children by a local search (memetic mode)
+        start = timer.start()
+        new_population.local_search(
+            local_search.select_rows(new_population.fitness, number_of_copies, ga_config, rng),
+            ga_config.local_search_steps)
+        timer.stop('local_search', start)
+    start = timer.start()
+    new_population.sort()
+    timer.stop('sort', start)
+    return new_population
+
+
+def vectorized_evolve(ga_config: GAConfig = None, timer=NULL_TIMER, rng: np.random.Generator = None,
+                      telemetry=NULL_TELEMETRY):
+    """
+    Vectorized generation engine, selected with engine = 'vectorized'.
+    Uses the same configuration as main.main, but one generation is a fixed pipeline of array operations
+    on an ArrayPopulation instead of a Python loop over pairs of children:
+        copy the fittest Organisms (copy_threshold) by slicing
+        select all parents with one call
+        crossover of all pairs with one call (crossover_probability masking included)
+        mutate all children with one call
+        compute the fitness of all children with one call
+        improve the fittest children by a local search if memetic is True
+        and sort with argsort
+        check for convergence if a convergence_action is set
+    :param ga_config: GAConfig of the run, if None it is created from config.py
+    :param timer: profiling.PhaseTimer which accumulates the time per phase
+    :param rng: np.random.Generator of the run, if None it is created from ga_config.seed
+    :param telemetry: telemetry.Telemetry which records every generation, it is flushed but not closed
+    :return: final ArrayPopulation (sorted), iterations
+    """
+    ga_config = ga_config if ga_config is not None else GAConfig.from_config()
+    rng = rng if rng is not None else ga_config.make_rng()
+    fitness_cache = fitness.FitnessCache(ga_config.fitness_cache_size) if ga_config.fitness_cache_size else None
+    start = timer.start()
+    my_population = ArrayPopulation(size=ga_config.number_of_organisms, sort=True, ga_config=ga_config,
+                                    fitness_cache=fitness_cache, rng=rng)
+    timer.stop('population', start)
+    max_fitness = ga_config.max_fitness
+    number_of_copies = int(ga_config.number_of_organisms * ga_config.copy_threshold)
+    # produce pairs of children as long as the new population is smaller than the population size
+    number_of_pairs = max(0, -(-(ga_config.number_of_organisms - number_of_copies) // 2))
+    mutation_probability = ga_config.mutation_probability
+    # detects converged or stagnating populations, if a convergence action is set
+    monitor = ConvergenceMonitor(ga_config) if ga_config.convergence_action else None
+    telemetry.start()
+
+    iterations = 0
+    while my_population.fitness[0] != max_fitness and iterations < ga_config.max_iterations:
+        iterations += 1
+        if iterations % 100 == 0 and ga_config.verbose:
+            print(iterations, my_population.max_fitness_value())
+
+        # if adapt mutability is set to True it will increase the mutation_probability each 500 iterations
+        if iterations % 500 == 0 and ga_config.adapt_mutability:
+            mutation_probability = min(mutation_probability + 0.05, 1)
+
+        my_population = next_generation(my_population, number_of_copies, number_of_pairs, mutation_probability,
+                                        timer)
+        telemetry.record(iterations, my_population, mutation_probability)
+        # finish, restart or add random immigrants if the population converged (convergence_action)
+        if monitor is not None and my_population.fitness[0] != max_fitness:
+            start = timer.start()
+            stop = monitor.check(my_population)
+            timer.stop('convergence', start)
+            if stop:
+                break
+    telemetry.flush()
+    return my_population, iterations
+
+
+def select_parents_stacked(fitness_values: np.ndarray, k: int, method: str, ga_config: GAConfig,
+                           rng: np.random.Generator) -> np.ndarray:
+    """
+    Vectorized version of ArrayPopulation.select_parents for several populations at once, every population
+    selects only from its own block, see stacked_next_generation
+    :param fitness_values: np.ndarray of shape (number of populations, population size), every row sorted descendingly
+    :param k: number of parents per population
+    :param method: 'random', 'tournament', 'truncation', 'roulette'
+    :param ga_config: GAConfig of the run
+    :param rng: np.random.Generator of the run
+    :return: np.ndarray of shape (number of populations, k), indices of the parents within their population
+    """
+    number_of_populations, size = fitness_values.shape
+    if method == 'roulette':
+        # the accumulated fitness values of all populations in one array, a block starts at the total of the
+        # previous blocks, i.e. a random value within the range of a block always hits this block
+        accumulated = np.cumsum(fitness_values.ravel())
+        ends = accumulated[size - 1::size]
+        starts = np.concatenate(([0], ends[:-1]))
+        values = starts[:, np.newaxis] + rng.integers(0, (ends - starts).astype(np.int64)[:, np.newaxis],
+                                                      (number_of_populations, k))
+        # first index with an accumulated fitness > the random value, i.e. every Organism is hit by exactly
+        # as many values as its fitness
+        return (np.searchsorted(accumulated, values, side='right')
+                - size * np.arange(number_of_populations)[:, np.newaxis])
+    elif method == 'truncation':
+        return rng.integers(0, int(size * ga_config.truncation_threshold), (number_of_populations, k))
+    elif method == 'tournament':
+        chosen_for_tournament = rng.integers(0, size, (number_of_populations, k, ga_config.tournament_competitors))
+        competitor_fitness = np.take_along_axis(
+            fitness_values, chosen_for_tournament.reshape(number_of_populations, -1), axis=1
+        ).reshape(chosen_for_tournament.shape)
+        winners = np.argmax(competitor_fitness, axis=2)
+        return np.take_along_axis(chosen_for_tournament, winners[..., np.newaxis], axis=2)[..., 0]
+    elif method == 'random':
+        methods_without_random = ga_config.selection_method_list
+        methods = rng.integers(0, len(methods_without_random), (number_of_populations, k))
+        parents = np.empty((number_of_populations, k), dtype=int)
+        for i, method_without_random in enumerate(methods_without_random):
+            chosen = methods == i
+            parents[chosen] = select_parents_stacked(fitness_values, k, method_without_random, ga_config, rng)[chosen]
+        return parents
+    raise ValueError(f'Unknown selection method {method}')
+
+
+def stacked_next_generation(genotypes: np.ndarray, fitness_values: np.ndarray, number_of_copies: int,
+                            number_of_pairs: int, mutation_probabilities: np.ndarray, ga_config: GAConfig,
+                            rng: np.random.Generator) -> Tuple:
+    """
+    Computes the next generation of several independent populations of the same field size with one pipeline,
+    like next_generation: the populations are stacked into one array of blocks, selection and sorting
+    work per block, crossover, mutation and fitness on all rows at once.
+    :param genotypes: np.ndarray of shape (number of populations, population size, n), every block sorted
+    :param fitness_values: np.ndarray of shape (number of populations, population size)
+    :param number_of_copies: number of the fittest Organisms per population which are copied to the next generation
+    :param number_of_pairs: number of pairs of children per population
+    :param mutation_probabilities: np.ndarray of shape (number of populations,), current mutation probabilities
+    :param ga_config: GAConfig of the run
+    :param rng: np.random.Generator of the run
+    :return: genotypes and fitness values of the next generation, every block sorted
+    """
+    number_of_populations, size, field_size = genotypes.shape
+    ### SELECTION ###
+    parents = select_parents_stacked(fitness_values, 2 * number_of_pairs, ga_config.selection_method, ga_config, rng)
+    # indices within a block -> rows of the stacked array
+    parents = parents + size * np.arange(number_of_populations)[:, np.newaxis]
+
+    ### CROSSOVER ###
+    children1, children2 = crossover_batch(genotypes.reshape(-1, field_size), parents.reshape(-1, 2),
+                                           method=ga_config.crossover_method, ga_config=ga_config, rng=rng)
+    children = np.stack((children1, children2), axis=1).reshape(-1, field_size)
+
+    ### MUTATION ###
+    probabilities = np.repeat(mutation_probabilities, 2 * number_of_pairs)
+    mutate_batch(children, rng.random(len(children)) < probabilities, method=ga_config.mutation_method,
+                 ga_config=ga_config, rng=rng)
+
+    ### NEXT GENERATION ###
+    children_fitness = fitness.compute_fitness_batch(children, field_size)
+    new_genotypes = np.concatenate((genotypes[:, :number_of_copies],
+                                    children.reshape(number_of_populations, -1, field_size)), axis=1)
+    new_fitness = np.concatenate((fitness_values[:, :number_of_copies],
+                                  children_fitness.reshape(number_of_populations, -1)), axis=1)
+    if ga_config.memetic:
+        # improve the fittest children of every population by a local search (memetic mode)
+        for block in range(number_of_populations):
+            for row in local_search.select_rows(new_fitness[block], number_of_copies, ga_config, rng):
+                genotype = new_genotypes[block, row]
+                columns, diagonals, anti_diagonals = fitness.occupancy(genotype)
+                new_fitness[block, row] += local_search.min_conflicts(genotype, diagonals, anti_diagonals,
+                                                                      ga_config.local_search_steps, rng)
+    # sort every block descendingly (stable, like ArrayPopulation.sort)
+    order = np.argsort(-new_fitness, axis=1, kind='stable')
+    return (np.take_along_axis(new_genotypes, order[..., np.newaxis], axis=1),
+            np.take_along_axis(new_fitness, order, axis=1))
@@ -0,0 +1,213 @@
+from collections import OrderedDict
+
+import numpy as np
+
+
+def max_fitness(field_size: int) -> float:
+    """
+    Returns the maximal fitness value for a given field size, i.e. the fitness of an Organism without any collisions.
+    It is n*(n-1)/2, the number of collisions if all queens collide with each other.
+    :param field_size: int, number of queens
+    :return: float
+    """
+    return field_size * (field_size - 1) * 0.5
+
+
+def pairwise_fitness(genotype, field_size=None) -> float:
+    """
+    Reference implementation of the fitness function.
+    Compares every pair of queens, i.e. it needs O(n²) steps.
+    Kept to check the faster implementations against it.
+    :param genotype: np.ndarray or list, the column of the queen for every row
+    :param field_size: int, if None it is the length of the genotype
+    :return: float, fitness value
+    """
+    field_size = len(genotype) if field_size is None else field_size
+    fitness = max_fitness(field_size)
+    for i, pos1 in enumerate(genotype):
+        for j, pos2 in enumerate(genotype[i + 1:]):
+            # j+1 is equal to the differences in rows
+            # remember there can only be one queen per row but several per column
+            # compare j+1 with the difference in columns
+            # if equal the queens collides diagonally
+            if abs(pos1 - pos2) == j + 1:
+                # if equal subtract one from base fitness
+                fitness -= 1
+            if pos1 == pos2:
+                # the two queens are in one column
+                fitness -= 1
+    return fitness
+
+
+def occupancy(genotype) -> tuple:
+    """
+    Computes the occupancy histograms of a genotype.
+    Every queen is put into three buckets: its column, its diagonal (row - col) and its anti-diagonal (row + col).
+    The diagonal row - col is in [-(n-1), n-1] and therefore shifted by n-1 to [0, 2n-2].
+    :param genotype: np.ndarray or list, the column of the queen for every row
+    :return: three np.ndarrays, number of queens per column, per diagonal and per anti-diagonal
+    """
+    genotype = np.asarray(genotype)
+    size = len(genotype)
+    rows = np.arange(size)
+    columns = np.bincount(genotype, minlength=size)
+    diagonals = np.bincount(rows - genotype + size - 1, minlength=2 * size - 1)
+    anti_diagonals = np.bincount(rows + genotype, minlength=2 * size - 1)
+    return columns, diagonals, anti_diagonals
+
+
+def count_collisions(genotype) -> int:
+    """
+    Counts the number of colliding pairs of queens in O(n).
+    A bucket (column, diagonal or anti-diagonal) with c queens contributes c*(c-1)/2 colliding pairs.
+    Two different queens can share at most one of these buckets, hence no pair is counted twice.
+    :param genotype: np.ndarray or list, the column of the queen for every row
+    :return: int, number of colliding pairs
+    """
+    counts = np.concatenate(occupancy(genotype))
+    return int((counts * (counts - 1)).sum() // 2)
+
+
+def compute_fitness(genotype, field_size=None) -> float:
+    """
+    Computes the fitness of a genotype with diagonal occupancy histograms, i.e. in O(n).
+    Returns exactly the same value as pairwise_fitness.
+    :param genotype: np.ndarray or list, the column of the queen for every row
+    :param field_size: int, if None it is the length of the genotype
+    :return: float, fitness value
+    """
+    field_size = len(genotype) if field_size is None else field_size
+    return max_fitness(field_size) - count_collisions(genotype)
+
+
+def occupancy_batch(genotypes) -> tuple:
+    """
+    Computes the occupancy histograms (see occupancy) of a whole batch of genotypes at once.
+    Every row gets its own range of buckets such that one np.bincount per bucket type covers the whole batch.
+    :param genotypes: np.ndarray of shape (number of genotypes, n)
+    :return: three np.ndarrays of shape (number of genotypes, n), (number of genotypes, 2n-1) and
+             (number of genotypes, 2n-1), number of queens per column, per diagonal and per anti-diagonal
+    """
+    genotypes = np.asarray(genotypes)
+    number, size = genotypes.shape
+    rows = np.arange(size)
+    buckets = 2 * size - 1
+    offsets = np.arange(number)[:, np.newaxis]
+    columns = np.bincount((genotypes + offsets * size).ravel(), minlength=number * size)
+    diagonals = np.bincount((rows - genotypes + size - 1 + offsets * buckets).ravel(), minlength=number * buckets)
+    anti_diagonals = np.bincount((rows + genotypes + offsets * buckets).ravel(), minlength=number * buckets)
+    return columns.reshape(number, size), diagonals.reshape(number, buckets), anti_diagonals.reshape(number, buckets)
+
+
+def count_collisions_batch(genotypes, histograms=None) -> np.ndarray:
+    """
+    Counts the number of colliding pairs of queens for a whole batch of genotypes at once.
+    Same as count_collisions, but with the histograms of occupancy_batch.
+    :param genotypes: np.ndarray of shape (number of genotypes, n)
+    :param histograms: the result of occupancy_batch for the genotypes, if None they are computed
+    :return: np.ndarray of shape (number of genotypes,), number of colliding pairs per genotype
+    """
+    columns, diagonals, anti_diagonals = histograms if histograms is not None else occupancy_batch(genotypes)
+    collisions = (columns * (columns - 1)).sum(axis=1)
+    collisions += (diagonals * (diagonals - 1)).sum(axis=1)
+    collisions += (anti_diagonals * (anti_diagonals - 1)).sum(axis=1)
+    return collisions // 2
+
+
+def compute_fitness_batch(genotypes, field_size=None, histograms=None) -> np.ndarray:
+    """
+    Computes the fitness of a whole batch of genotypes, e.g. all children of a generation, in a few array operations.
+    Returns exactly the same values as compute_fitness for every row.
+    :param genotypes: np.ndarray of shape (number of genotypes, n)
+    :param field_size: int, if None it is the length of the genotypes
+    :param histograms: the result of occupancy_batch for the genotypes, if None they are computed
+    :return: np.ndarray of shape (number of genotypes,), fitness values
+    """
+    genotypes = np.asarray(genotypes)
+    field_size = genotypes.shape[1] if field_size is None else field_size
+    return max_fitness(field_size) - count_collisions_batch(genotypes, histograms)
+
+
+class FitnessCache:
+    """
+    Optional memoization of fitness values keyed by the genotype bytes with LRU eviction.
+    Pays off once a population converged and the same genotypes are scored over and over again.
+    """
+
+    def __init__(self, max_size: int):
+        """
+        :param max_size: maximal number of cached fitness values, the least recently used one is evicted first
+        """
+        self.max_size = max_size
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.cache)
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        Ratio of the lookups which were answered from the cache
+        :return: float between 0 and 1
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get(self, genotype: np.ndarray):
+        """
+        Returns the cached fitness of a genotype
+        :param genotype: np.ndarray
+        :return: float or None if the genotype is not cached
+        """
+        key = genotype.tobytes()
+        value = self.cache.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.cache.move_to_end(key)
+        return value
+
+    def put(self, genotype: np.ndarray, value: float):
+        """
+        Caches the fitness of a genotype and evicts the least recently used one if the cache is full
+        :param genotype: np.ndarray
+        :param value: float, fitness
+        :return:
+        """
+        self._store(genotype.tobytes(), value)
+
+    def _store(self, key: bytes, value: float):
+        self.cache[key] = value
+        self.cache.move_to_end(key)
+        if len(self.cache) > self.max_size:
+            self.cache.popitem(last=False)
+
+    def compute_fitness_batch(self, genotypes: np.ndarray, field_size=None) -> np.ndarray:
+        """
+        Same as fitness.compute_fitness_batch, but only the genotypes which are not cached are scored
+        (with one batched call) and then added to the cache
+        :param genotypes: np.ndarray of shape (number of genotypes, n)
+        :param field_size: int, if None it is the length of the genotypes
+        :return: np.ndarray of shape (number of genotypes,), fitness values
+        """
+        keys = [genotype.tobytes() for genotype in genotypes]
+        fitness_values = np.empty(len(keys))
+        missing = []
+        for i, key in enumerate(keys):
+            value = self.cache.get(key)
+            if value is None:
+                missing.append(i)
+            else:
+                fitness_values[i] = value
+                self.cache.move_to_end(key)
+        self.hits += len(keys) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            computed = compute_fitness_batch(genotypes[missing], field_size)
+            fitness_values[missing] = computed
+            for i, value in zip(missing, computed.tolist()):
+                self._store(keys[i], value)
+        return fitness_values
@@ -0,0 +1,116 @@
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+
+import config
+
+# random generator for Organisms and Populations which are created without one, e.g. outside of a run
+global_rng = np.random.default_rng()
+
+
+class GAConfig(NamedTuple):
+    """
+    Immutable configuration of one run.
+    It is passed explicitly to Population, Organism and the main loop instead of reading the module globals in
+    config.py, such that concurrent runs in threads or processes cannot influence each other.
+    Create it with GAConfig.from_config() to take the values of config.py, single values can be
+    overridden, e.g. GAConfig.from_config(field_size=20) or my_config._replace(mutation_probability=0.5).
+    """
+    field_size: int
+    number_of_organisms: int
+    max_iterations: int
+    seed: Optional[int]
+    engine: str
+    fitness_cache_size: int
+    population_backend: str
+
+    # SELECTION PARAMETERS
+    selection_method: str
+    truncation_threshold: float
+    tournament_competitors: int
+    copy_threshold: float
+    selection_method_list: Tuple[str, ...]
+
+    # CROSSOVER PARAMETERS
+    crossover_method: str
+    crossover_probability: float
+    crossover_method_list: Tuple[str, ...]
+
+    # MUTATION PARAMETERS
+    mutation_method: str
+    mutation_probability: float
+    adapt_mutability: bool
+    mutation_method_list: Tuple[str, ...]
+
+    # LOCAL SEARCH PARAMETERS
+    memetic: bool
+    local_search_intensity: float
+    local_search_top_k: int
+    local_search_steps: int
+
+    # CONVERGENCE PARAMETERS
+    convergence_action: Optional[str]
+    diversity_threshold: float
+    stagnation_window: int
+    immigrant_fraction: float
+
+    # ISLAND MODEL PARAMETERS
+    number_of_islands: int
+    island_workers: Optional[int]
+    migration_interval: int
+    migration_size: int
+    migration_topology: str
+
+    verbose: bool
+    profile_phases: bool
+    profile_dump: Optional[str]
+    telemetry: Tuple[str, ...]
+    telemetry_path: str
+    telemetry_batch_size: int
+    validate_genotypes: bool
+    debug_fitness: bool
+
+    @classmethod
+    def from_config(cls, **overrides):
+        """
+        Creates a GAConfig from the current values in config.py
+        :param overrides: values which replace the ones from config.py
+        :return: GAConfig
+        """
+        values = {name: getattr(config, name) for name in cls._fields}
+        values.update(overrides)
+        for name in ('selection_method_list', 'crossover_method_list', 'mutation_method_list', 'telemetry'):
+            values[name] = tuple(values[name])
+        return cls(**values)
+
+    def seeded(self):
+        """
+        Returns the GAConfig with a fixed seed, i.e. if seed is None a random one is drawn (the entropy of a new
+        np.random.SeedSequence) such that the run can be recorded and replayed
+        :return: GAConfig
+        """
+        return self if self.seed is not None else self._replace(seed=np.random.SeedSequence().entropy)
+
+    def make_rng(self) -> np.random.Generator:
+        """
+        Creates the random generator of a run from the seed, every run owns one generator
+        :return: np.random.Generator
+        """
+        return np.random.default_rng(self.seed)
+
+    def spawn_rngs(self, number: int) -> list:
+        """
+        Creates independent child generators from the seed, e.g. one per island or population.
+        Uses np.random.SeedSequence.spawn (numpy 1.17+) instead of Generator.spawn (numpy 1.25+).
+        :param number: number of generators
+        :return: list of np.random.Generator
+        """
+        return [np.random.default_rng(child) for child in np.random.SeedSequence(self.seed).spawn(number)]
+
+    @property
+    def max_fitness(self) -> float:
+        """
+        The fitness of a solution, i.e. no collisions, for the field size
+        :return: float
+        """
+        return self.field_size * (self.field_size - 1) * 0.5
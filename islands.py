@@ -0,0 +1,167 @@
+#######################
+#
+#   Island model: independent sub-populations evolve in a process pool
+#   and periodically exchange their fittest Organisms
+#
+#######################
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import Manager
+import time
+
+import numpy as np
+
+from engine import next_generation
+from ga_config import GAConfig, global_rng
+from population import ArrayPopulation
+
+
+def neighbours(island: int, number_of_islands: int, topology: str, rng: np.random.Generator = None) -> list:
+    """
+    Returns the islands which receive the migrants of a given island
+    Possible topologies:    'ring': the next island
+                            'fully_connected': all other islands
+                            'random': one randomly chosen other island
+    :param island: index of the island
+    :param number_of_islands: int
+    :param topology: 'ring', 'fully_connected' or 'random'
+    :param rng: np.random.Generator of the run, if None the shared global generator is used
+    :return: list of island indices
+    """
+    rng = rng if rng is not None else global_rng
+    if number_of_islands < 2:
+        return []
+    if topology == 'ring':
+        return [(island + 1) % number_of_islands]
+    elif topology == 'fully_connected':
+        return [i for i in range(number_of_islands) if i != island]
+    elif topology == 'random':
+        return [(island + rng.integers(1, number_of_islands)) % number_of_islands]
+    raise ValueError(f'Unknown migration topology {topology}')
+
+
+def evolve_island(island: dict, ga_config: GAConfig, generations: int, solved) -> dict:
+    """
+    Runs a number of generations of one island in a worker process.
+    Stops early if this or any other island found a solution.
+    :param island: dict with 'genotypes', 'fitness', 'iterations', 'mutation_probability' and 'rng' of the island,
+                   every island owns its random generator (a child stream of the generator of the run)
+    :param ga_config: GAConfig of the run
+    :param generations: maximal number of generations
+    :param solved: shared Event, set as soon as an island reaches the maximal fitness
+    :return: dict, the island after the generations
+    """
+    max_fitness = ga_config.max_fitness
+    number_of_copies = int(ga_config.number_of_organisms * ga_config.copy_threshold)
+    number_of_pairs = max(0, -(-(ga_config.number_of_organisms - number_of_copies) // 2))
+    mutation_probability = island['mutation_probability']
+
+    my_population = ArrayPopulation.from_arrays(island['genotypes'], island['fitness'], ga_config, sort=False,
+                                                rng=island['rng'])
+    iterations = island['iterations']
+    for _ in range(generations):
+        if my_population.fitness[0] == max_fitness or iterations >= ga_config.max_iterations or solved.is_set():
+            break
+        iterations += 1
+        if iterations % 500 == 0 and ga_config.adapt_mutability:
+            mutation_probability = min(mutation_probability + 0.05, 1)
+        my_population = next_generation(my_population, number_of_copies, number_of_pairs, mutation_probability)
+    if my_population.fitness[0] == max_fitness:
+        solved.set()
+    # the generator is returned with its advanced state, such that the next epoch continues the stream
+    return {'genotypes': my_population.genotypes, 'fitness': my_population.fitness, 'iterations': iterations,
+            'mutation_probability': mutation_probability, 'rng': my_population.rng}
+
+
+def migrate(islands: list, topology: str, migration_size: int, ga_config: GAConfig,
+            rng: np.random.Generator = None):
+    """
+    Copies the migration_size fittest Organisms of every island to its neighbours.
+    The migrants of all sources of an island replace its least fit Organisms at once
+    (at most the whole population), nothing happens if migration_size is 0
+    :param islands: list of island dicts, changed in place
+    :param topology: see neighbours
+    :param migration_size: number of migrants per neighbour
+    :param ga_config: GAConfig of the run
+    :param rng: np.random.Generator of the run, used for the random topology
+    :return:
+    """
+    if migration_size <= 0:
+        return
+    migrants = [(island['genotypes'][:migration_size].copy(), island['fitness'][:migration_size].copy())
+                for island in islands]
+    # gather the migrants of all sources first, such that later sources do not replace earlier migrants
+    incoming = [[] for _ in islands]
+    for i, migrant in enumerate(migrants):
+        for j in neighbours(i, len(islands), topology, rng):
+            incoming[j].append(migrant)
+    for island, arrivals in zip(islands, incoming):
+        if not arrivals:
+            continue
+        genotypes = np.concatenate([genotypes for genotypes, _ in arrivals])
+        fitness_values = np.concatenate([fitness_values for _, fitness_values in arrivals])
+        # at most the whole population is replaced, then only the fittest migrants stay
+        number = min(len(fitness_values), len(island['fitness']))
+        fittest = np.argsort(-fitness_values, kind='stable')[:number]
+        keep = len(island['fitness']) - number
+        island['genotypes'] = np.concatenate((island['genotypes'][:keep], genotypes[fittest]))
+        island['fitness'] = np.concatenate((island['fitness'][:keep], fitness_values[fittest]))
+    for island in islands:
+        population = ArrayPopulation.from_arrays(island['genotypes'], island['fitness'], ga_config)
+        island['genotypes'], island['fitness'] = population.genotypes, population.fitness
+
+
+def run_islands(ga_config: GAConfig = None):
+    """
+    Island model: starts number_of_islands sub-populations in a process pool.
+    Every island runs the configured selection/crossover/mutation (see engine.next_generation), every
+    migration_interval generations the fittest Organisms migrate to the neighbours given by
+    migration_topology. The run stops as soon as any island reaches the maximal fitness.
+    :param ga_config: GAConfig of the run, if None it is created from config.py
+    :return: iterations, computation time, fitness of the fittest Organism,
+             average fitness of the island of the fittest Organism, statistics per island
+    """
+    t0 = time.time()
+    ga_config = (ga_config if ga_config is not None else GAConfig.from_config()).seeded()
+    max_fitness = ga_config.max_fitness
+    rng = ga_config.make_rng()
+    islands = []
+    # every island gets its own child stream, otherwise forked workers could share one random state
+    for island_rng in ga_config.spawn_rngs(ga_config.number_of_islands):
+        population = ArrayPopulation(size=ga_config.number_of_organisms, sort=True, ga_config=ga_config,
+                                     rng=island_rng)
+        islands.append({'genotypes': population.genotypes, 'fitness': population.fitness, 'iterations': 0,
+                        'mutation_probability': ga_config.mutation_probability, 'rng': island_rng})
+
+    with Manager() as manager, ProcessPoolExecutor(max_workers=ga_config.island_workers) as executor:
+        solved = manager.Event()
+        while True:
+            futures = [executor.submit(evolve_island, island, ga_config, ga_config.migration_interval, solved)
+                       for island in islands]
+            islands = [future.result() for future in futures]
+            if solved.is_set() or all(island['iterations'] >= ga_config.max_iterations for island in islands):
+                break
+            migrate(islands, ga_config.migration_topology, ga_config.migration_size, ga_config, rng)
+            if ga_config.verbose:
+                print(max(island['iterations'] for island in islands),
+                      [float(island['fitness'][0]) for island in islands])
+
+    island_statistics = [{'island': i,
+                          'iterations': island['iterations'],
+                          'fitness': float(island['fitness'][0]),
+                          'average_fitness': float(island['fitness'].mean()),
+                          'solved': bool(island['fitness'][0] == max_fitness)}
+                         for i, island in enumerate(islands)]
+    best = max(island_statistics, key=lambda x: x['fitness'])
+    computation_time = time.time() - t0
+    if ga_config.verbose:
+        print(ArrayPopulation.from_arrays(islands[best['island']]['genotypes'],
+                                          islands[best['island']]['fitness'], ga_config).fittest_organism())
+        for statistics in island_statistics:
+            print(statistics)
+        print(f'Seed: {ga_config.seed}\nNumber of Iterations:{best["iterations"]}\nTotal Time: {computation_time}')
+    return best['iterations'], computation_time, best['fitness'], best['average_fitness'], island_statistics
+
+
+if __name__ == '__main__':
+    run_islands()
@@ -0,0 +1,99 @@
+import numpy as np
+
+from ga_config import GAConfig, global_rng
+
+
+def swap_deltas(genotype: np.ndarray, diagonals: np.ndarray, anti_diagonals: np.ndarray, row: int) -> np.ndarray:
+    """
+    Computes for every row the change of the number of colliding pairs if its queen is swapped with the queen of
+    the given row. Every swap is scored in O(1) from the diagonal occupancy histograms (see fitness.occupancy),
+    swaps never change the columns of a permutation.
+    The entry of the given row itself is meaningless.
+    :param genotype: np.ndarray, a permutation
+    :param diagonals: np.ndarray, number of queens per diagonal (row - col + n - 1)
+    :param anti_diagonals: np.ndarray, number of queens per anti-diagonal (row + col)
+    :param row: int
+    :return: int np.ndarray of shape (n,), negative values reduce the collisions
+    """
+    size = len(genotype)
+    rows = np.arange(size)
+    column = genotype[row]
+    return (_bucket_deltas(diagonals, row - column + size - 1, rows - genotype + size - 1,
+                           row - genotype + size - 1, rows - column + size - 1)
+            + _bucket_deltas(anti_diagonals, row + column, rows + genotype, row + genotype, rows + column))
+
+
+def _bucket_deltas(counts, old_buckets1, old_buckets2, new_buckets1, new_buckets2) -> np.ndarray:
+    """
+    Change of the number of colliding pairs of one kind of bucket if two queens move from their old buckets
+    to their new buckets. A queen leaving a bucket with c queens removes c-1 pairs, a queen entering a bucket with
+    c queens adds c pairs, the terms in brackets correct for two queens sharing a bucket.
+    """
+    return (counts[new_buckets1] + counts[new_buckets2] + (new_buckets1 == new_buckets2)
+            - counts[old_buckets1] - counts[old_buckets2] + 2 + (old_buckets1 == old_buckets2))
+
+
+def min_conflicts(genotype: np.ndarray, diagonals: np.ndarray, anti_diagonals: np.ndarray, steps: int,
+                  rng: np.random.Generator = None) -> int:
+    """
+    Min-conflicts hill climbing on a permutation, changes genotype and histograms in place.
+    In every step a random attacked queen is swapped with the queen which results in the fewest collisions,
+    ties are broken randomly. Swaps which would increase the collisions are not done.
+    Stops after the given number of steps or if there are no collisions anymore.
+    :param genotype: np.ndarray, a permutation
+    :param diagonals: np.ndarray, number of queens per diagonal, see fitness.occupancy
+    :param anti_diagonals: np.ndarray, number of queens per anti-diagonal, see fitness.occupancy
+    :param steps: int, maximal number of steps
+    :param rng: np.random.Generator of the run, if None the shared global generator is used
+    :return: int, number of removed colliding pairs, i.e. the increase of the fitness
+    """
+    rng = rng if rng is not None else global_rng
+    size = len(genotype)
+    rows = np.arange(size)
+    gain = 0
+    for _ in range(steps):
+        attacked = np.flatnonzero((diagonals[rows - genotype + size - 1] > 1) | (anti_diagonals[rows + genotype] > 1))
+        if len(attacked) == 0:
+            break
+        row = attacked[rng.integers(0, len(attacked))]
+        deltas = swap_deltas(genotype, diagonals, anti_diagonals, row)
+        # swapping a queen with itself is no move
+        deltas[row] = deltas.max() + 1
+        best = np.flatnonzero(deltas == deltas.min())
+        other = best[rng.integers(0, len(best))]
+        if deltas[other] > 0:
+            continue
+        # move both queens in the histograms
+        column, other_column = genotype[row], genotype[other]
+        diagonals[row - column + size - 1] -= 1
+        diagonals[other - other_column + size - 1] -= 1
+        anti_diagonals[row + column] -= 1
+        anti_diagonals[other + other_column] -= 1
+        genotype[row], genotype[other] = other_column, column
+        diagonals[row - other_column + size - 1] += 1
+        diagonals[other - column + size - 1] += 1
+        anti_diagonals[row + other_column] += 1
+        anti_diagonals[other + column] += 1
+        gain -= int(deltas[other])
+    return gain
+
+
+def select_rows(fitness_values: np.ndarray, number_of_copies: int, ga_config: GAConfig,
+                rng: np.random.Generator = None) -> np.ndarray:
+    """
+    Chooses the children of a generation which are improved by the local search (memetic mode):
+    with probability ga_config.local_search_intensity the local_search_top_k fittest children which are
+    not a solution yet, otherwise none.
+    The first number_of_copies rows are the copied Organisms of the last generation, not children.
+    :param fitness_values: np.ndarray, fitness values of the generation
+    :param number_of_copies: int
+    :param ga_config: GAConfig of the run
+    :param rng: np.random.Generator of the run, if None the shared global generator is used
+    :return: np.ndarray, row indices
+    """
+    rng = rng if rng is not None else global_rng
+    if rng.random() >= ga_config.local_search_intensity:
+        return np.empty(0, dtype=int)
+    children = fitness_values[number_of_copies:]
+    rows = np.argsort(-children, kind='stable')[:ga_config.local_search_top_k]
+    return number_of_copies + rows[children[rows] < ga_config.max_fitness]
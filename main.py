@@ -1,12 +1,34 @@
-import numpy as np
+import cProfile
+import os
 import time
 
-from population import Population
-import config
+import numpy as np
 
+from engine import vectorized_evolve
+from convergence import ConvergenceMonitor
+from population import Population, ArrayPopulation
+from ga_config import GAConfig
+import fitness
+import local_search
+from profiling import PhaseTimer, NULL_TIMER
+from telemetry import Telemetry, NULL_TELEMETRY
 
-def main():
-    t0 = time.time()
+
+def evolve(ga_config: GAConfig = None, timer=NULL_TIMER, rng: np.random.Generator = None,
+           telemetry=NULL_TELEMETRY):
+    """
+    Runs the genetic algorithm until a solution is found or max_iterations is reached
+    :param ga_config: GAConfig of the run, if None it is created from config.py
+    :param timer: profiling.PhaseTimer which accumulates the time per phase
+    :param rng: np.random.Generator of the run, if None it is created from ga_config.seed
+    :param telemetry: telemetry.Telemetry which records every generation, it is flushed but not closed
+    :return: final population (sorted), iterations
+    """
+    ga_config = ga_config if ga_config is not None else GAConfig.from_config()
+    # all random decisions of the run are drawn from this generator
+    rng = rng if rng is not None else ga_config.make_rng()
+    if ga_config.engine == 'vectorized':
+        return vectorized_evolve(ga_config, timer, rng, telemetry)
     # 1
     # generate initial population of N organisms randomly
     # but maybe with given conditions taken into account
@@ -16,68 +38,173 @@ def main():
     # 2
     # compute fitness of each individual
     # population = individual.compute_fitness_of_all(population)
-    my_population = Population(size=config.number_of_organisms, sort=True)
+    array_backend = ga_config.population_backend == 'array'
+    population_class = ArrayPopulation if array_backend else Population
+    number_of_organisms = ga_config.number_of_organisms
+    # optional memoization of fitness values of the run
+    fitness_cache = fitness.FitnessCache(ga_config.fitness_cache_size) if ga_config.fitness_cache_size else None
+    start = timer.start()
+    my_population = population_class(size=number_of_organisms, sort=True, ga_config=ga_config,
+                                     fitness_cache=fitness_cache, rng=rng)
+    timer.stop('population', start)
+    telemetry.start()
+
+    # bind the values used in every iteration locally
+    selection_method = ga_config.selection_method
+    crossover_method = ga_config.crossover_method
+    mutation_method = ga_config.mutation_method
+    # the mutation_probability may be adapted during the run, it is never written back to the config
+    mutation_probability = ga_config.mutation_probability
+
+    # detects converged or stagnating populations, if a convergence action is set
+    monitor = ConvergenceMonitor(ga_config) if ga_config.convergence_action else None
 
     # compute the max_fitness value, i.e. no collisions, for a given field_size
-    max_fitness = config.field_size * (config.field_size - 1) * 0.5
+    max_fitness = ga_config.max_fitness
     iterations = 0
-    while my_population[0].fitness != max_fitness and iterations < config.max_iterations:
+    while my_population[0].fitness != max_fitness and iterations < ga_config.max_iterations:
         iterations += 1
-        if iterations % 100 == 0 and config.verbose:
+        if iterations % 100 == 0 and ga_config.verbose:
             print(iterations, my_population.max_fitness_value())
 
         # if adapt mutability is set to True it will increase the mutation_probability each 1000 iterations
         # by 10%
-        if iterations % 500 == 0 and config.adapt_mutability:
-            config.mutation_probability = min(config.mutation_probability + 0.05, 1)
+        if iterations % 500 == 0 and ga_config.adapt_mutability:
+            mutation_probability = min(mutation_probability + 0.05, 1)
 
         ### NEXT GENERATION ###
         # produce next generation
         # copy the fittest Organisms to the new population "they survive"
-        # percentage is determined by config.copy_threshold
-        new_pop = Population(my_population[:int(my_population.size() * config.copy_threshold)])
+        # percentage is determined by copy_threshold
+        number_of_copies = int(my_population.size() * ga_config.copy_threshold)
+        start = timer.start()
+        new_pop = population_class(my_population[:number_of_copies], ga_config=ga_config,
+                                   fitness_cache=fitness_cache, rng=rng)
+        timer.stop('population', start)
 
-        # repeat as long as the new population is smaller than the population size
-        while new_pop.size() < config.number_of_organisms:
-            ### SELECTION ###
-            # selecting two organisms from old generation for mating
-            # choose fitter ones, maybe not THE fittest
-            parent1 = my_population.select_parent(method=config.selection_method)
-            parent2 = my_population.select_parent(method=config.selection_method)
+        # produce pairs of children as long as the new population is smaller than the population size
+        number_of_pairs = max(0, -(-(number_of_organisms - new_pop.size()) // 2))
+        ### SELECTION ###
+        # selecting all organisms from old generation for mating with one call
+        # choose fitter ones, maybe not THE fittest
+        start = timer.start()
+        parents = my_population.select_parents(2 * number_of_pairs, method=selection_method)
+        timer.stop('selection', start)
+        for parent1_index, parent2_index in parents.reshape(-1, 2).tolist():
+            parent1 = my_population[parent1_index]
+            parent2 = my_population[parent2_index]
 
             ### CROSSOVER ###
             # recombine genetic material with probability p_c, i.e. crossover
             # mutate with very small probability
             # create a pair of children
-            child1, child2 = my_population.crossover(parent1, parent2, method=config.crossover_method)
+            start = timer.start()
+            child1, child2 = my_population.crossover(parent1, parent2, method=crossover_method)
+            timer.stop('crossover', start)
 
             ### MUTATION ###
             # let the children mutate with a small probability
-            if np.random.uniform() < config.mutation_probability:
-                child1.mutate(config.mutation_method)
-            if np.random.uniform() < config.mutation_probability:
-                child2.mutate(config.mutation_method)
+            # (the array backend mutates all children at once after the loop)
+            if not array_backend:
+                start = timer.start()
+                if rng.random() < mutation_probability:
+                    child1.mutate(mutation_method)
+                if rng.random() < mutation_probability:
+                    child2.mutate(mutation_method)
+                timer.stop('mutation', start)
 
             # insert into new population
+            start = timer.start()
             new_pop.add(child1, child2)
+            timer.stop('population', start)
+
+        if array_backend:
+            # let all children (not the copied fittest Organisms) mutate with one batched call
+            start = timer.start()
+            mutate = rng.random(new_pop.size()) < mutation_probability
+            mutate[:number_of_copies] = False
+            new_pop.mutate(mutate, mutation_method)
+            timer.stop('mutation', start)
 
         # 4
         # replace the old population with the new one
+        # and score all children of the generation with one batched call
         my_population = new_pop
+        start = timer.start()
+        my_population.evaluate()
+        timer.stop('fitness', start)
+        if ga_config.memetic:
+            # improve the fittest children by a local search (memetic mode)
+            start = timer.start()
+            my_population.local_search(
+                local_search.select_rows(my_population.fitness_values(), number_of_copies, ga_config, rng),
+                ga_config.local_search_steps)
+            timer.stop('local_search', start)
+        start = timer.start()
         my_population.sort()
+        timer.stop('sort', start)
+        telemetry.record(iterations, my_population, mutation_probability)
 
         # 5
         # if satisfied with fittest individual -> finish
-        # if population converged, i.e. 95% of individuals are the same -> finish
+        # if population converged, i.e. too few different individuals or no improvement for a long time
+        # -> finish, restart or add random immigrants (convergence_action)
         # otherwise go to 3 and repeat
+        if monitor is not None and my_population[0].fitness != max_fitness:
+            start = timer.start()
+            stop = monitor.check(my_population)
+            timer.stop('convergence', start)
+            if stop:
+                break
+
+    telemetry.flush()
+    return my_population, iterations
 
+
+def main(ga_config: GAConfig = None, telemetry: Telemetry = None):
+    """
+    Runs the genetic algorithm
+    If no seed is configured a random one is drawn, it is printed if verbose is True.
+    If profile_phases is True the time and number of calls per phase (see profiling.phases) are measured,
+    if profile_dump is set a cProfile dump of the run is written to that directory.
+    :param ga_config: GAConfig of the run, if None it is created from config.py
+    :param telemetry: telemetry.Telemetry which records every generation, e.g. with a RingBuffer,
+                      if None it is created from the telemetry sinks in the config and closed after the run
+    :return: iterations, computation time, fitness of the fittest Organism, average fitness of the final population,
+             dict phase -> {'time': seconds, 'calls': int} (empty if profile_phases is False)
+    """
+    ga_config = (ga_config if ga_config is not None else GAConfig.from_config()).seeded()
+    timer = PhaseTimer() if ga_config.profile_phases else NULL_TIMER
+    profiler = cProfile.Profile() if ga_config.profile_dump else None
+    own_telemetry = telemetry is None
+    telemetry = Telemetry.from_config(ga_config) if own_telemetry else telemetry
+    t0 = time.time()
+    if profiler is not None:
+        profiler.enable()
+    my_population, iterations = evolve(ga_config, timer, telemetry=telemetry)
+    if profiler is not None:
+        profiler.disable()
+    if own_telemetry:
+        telemetry.close()
     the_winner = my_population.fittest_organism()
     computation_time = time.time()-t0
-    if config.verbose:
+    if profiler is not None:
+        os.makedirs(ga_config.profile_dump, exist_ok=True)
+        # one file per run, e.g. profiles/main_40_12345_1700000000000000000.pstats, read it with pstats.Stats
+        profiler.dump_stats(os.path.join(ga_config.profile_dump,
+                                         f'main_{ga_config.field_size}_{os.getpid()}_{time.time_ns()}.pstats'))
+    fitness_cache = my_population.fitness_cache
+    if ga_config.verbose:
         print(the_winner)
         print(
-            f'Number of Iterations:{iterations}\nTotal Time: {computation_time}\nAverage Fitness of final Population: {my_population.compute_average_fitness()}')
-    return iterations, computation_time, the_winner.fitness, my_population.compute_average_fitness()
+            f'Seed: {ga_config.seed}\nNumber of Iterations:{iterations}\nTotal Time: {computation_time}\nAverage Fitness of final Population: {my_population.compute_average_fitness()}')
+        if fitness_cache is not None:
+            print(f'Fitness Cache Hit Rate: {fitness_cache.hit_rate} ({fitness_cache.hits} hits, '
+                  f'{fitness_cache.misses} misses)')
+        for phase, values in timer.as_dict().items():
+            print(f'{phase}: {values["time"]:.4f}s in {values["calls"]} calls')
+    return (iterations, computation_time, the_winner.fitness, my_population.compute_average_fitness(),
+            timer.as_dict())
 
 
 if __name__ == '__main__':
@@ -2,12 +2,23 @@ import numpy as np
 from typing import Tuple
 import sys
 
-import config
+from ga_config import GAConfig, global_rng
+import fitness
+import local_search
+
+# at most this many moved queens are updated one by one in the occupancy histograms,
+# for more queens a (vectorized) recomputation of the histograms is faster
+incremental_rows = 2
 
 
 class Organism:
+    # no per-instance dict, an Organism is only its genotype, fitness, config and occupancy histograms
+    # (and whether it shares the genotype and histograms with other Organisms, see copy_on_write)
+    # and the random generator of the run
+    __slots__ = ('genotype', '_fitness', 'ga_config', 'fitness_cache', 'columns', 'diagonals', 'anti_diagonals',
+                 'shared', 'rng')
 
-    def __init__(self, genotype=None):
+    def __init__(self, genotype=None, ga_config: GAConfig = None, validate=True, fitness_cache=None, rng=None):
         """
         Creates an Organism from either
             A given np.ndarray of the form [1,2,4,3,0,5]
@@ -16,28 +27,97 @@ class Organism:
         There can only be one queen per row and column!
         Per row is guaranteed because the index determines the row.
         Per column is guaranteed with np.unique, i.e. each element (column) does only occur once.
+        Children of the crossover operators are valid permutations by construction, they skip this check
+        unless ga_config.validate_genotypes is True (debug mode).
+        A given np.ndarray is not copied, i.e. it can be a view into a shared population buffer.
         :param genotype: np.ndarray, list or None
+        :param ga_config: GAConfig of the run, if None it is created from config.py
+        :param validate: if False a given genotype is not checked
+        :param fitness_cache: optional fitness.FitnessCache of the run
+        :param rng: np.random.Generator of the run, used for all random decisions of the Organism and its children,
+                    if None a shared global generator is used
         """
+        self.ga_config = ga_config if ga_config is not None else GAConfig.from_config()
+        self.fitness_cache = fitness_cache
+        self.rng = rng if rng is not None else global_rng
         if genotype is None:
-            # self.genotype = np.random.randint(0, config.field_size, config.field_size)
-            self.genotype = np.arange(config.field_size)
-            np.random.shuffle(self.genotype)
+            # self.genotype = np.random.randint(0, self.ga_config.field_size, self.ga_config.field_size)
+            self.genotype = np.arange(self.ga_config.field_size)
+            self.rng.shuffle(self.genotype)
         elif type(genotype) is np.ndarray:
-            if len(genotype) == len(np.unique(genotype)):
+            if not validate or len(genotype) == len(np.unique(genotype)):
                 self.genotype = genotype
             else:
                 print('There are several queens per column! Exit.')
                 sys.exit(1)
         elif type(genotype) is list:
-            if len(genotype) == len(np.unique(genotype)):
+            if not validate or len(genotype) == len(np.unique(genotype)):
                 self.genotype = np.array(genotype)
             else:
                 print('There are several queens per column! Exit.')
                 sys.exit(1)
         else:
             print('Type of genotype is not correct. Either specify np.ndarray, list or None.')
-        self.fitness = 0
-        self.compute_fitness()  # set fitness
+        # the fitness is computed lazily on first access or for a whole generation by Population.evaluate
+        self._fitness = None
+        self.columns = self.diagonals = self.anti_diagonals = None
+        self.shared = False
+
+    @classmethod
+    def from_genotype(cls, genotype: np.ndarray, fitness_value: float, ga_config: GAConfig, fitness_cache=None,
+                      shared=False, rng=None):
+        """
+        Creates an Organism from a genotype with an already known fitness value,
+        e.g. a copy of or a view into a row of an ArrayPopulation.
+        There is neither a validation nor a recomputation of the fitness,
+        the occupancy histograms are only computed if a mutation needs them.
+        Mutations change the genotype in place, i.e. a view writes through to the shared buffer,
+        unless shared is True, then the genotype is copied before the first change (copy-on-write).
+        :param genotype: np.ndarray, a valid genotype
+        :param fitness_value: float, the fitness of the genotype
+        :param ga_config: GAConfig of the run
+        :param fitness_cache: optional fitness.FitnessCache of the run
+        :param shared: if True the genotype is never changed in place
+        :param rng: np.random.Generator of the run, if None a shared global generator is used
+        :return: Organism
+        """
+        organism = cls.__new__(cls)
+        organism.ga_config = ga_config
+        organism.fitness_cache = fitness_cache
+        organism.genotype = genotype
+        organism._fitness = fitness_value
+        organism.columns = organism.diagonals = organism.anti_diagonals = None
+        organism.shared = shared
+        organism.rng = rng if rng is not None else global_rng
+        return organism
+
+    def copy_on_write(self):
+        """
+        Returns a copy of the Organism which shares genotype, fitness and occupancy histograms with it.
+        Nothing is copied now, both Organisms copy their arrays before they change them for the first time,
+        i.e. a mutation of the copy never changes the original (and vice versa)
+        and an unchanged copy keeps the fitness without any recomputation.
+        :return: Organism
+        """
+        self.shared = True
+        organism = Organism.from_genotype(self.genotype, self._fitness, self.ga_config, self.fitness_cache,
+                                          shared=True, rng=self.rng)
+        organism.columns, organism.diagonals, organism.anti_diagonals = (
+            self.columns, self.diagonals, self.anti_diagonals)
+        return organism
+
+    def _own_genotype(self):
+        """
+        Copies a shared genotype and its occupancy histograms before they are changed in place
+        :return:
+        """
+        if self.shared:
+            self.genotype = self.genotype.copy()
+            if self.columns is not None:
+                self.columns = self.columns.copy()
+                self.diagonals = self.diagonals.copy()
+                self.anti_diagonals = self.anti_diagonals.copy()
+            self.shared = False
 
     def __repr__(self):
         """
@@ -46,37 +126,153 @@ class Organism:
         """
         repr = [f'Fitness: {self.fitness}']
         repr.append(f'Genotype: {self.genotype}')
-        # repr.append((config.field_size * 2 + 1) * '-')
+        # repr.append((self.ga_config.field_size * 2 + 1) * '-')
         for i in self.genotype:
-            repr.append('|' + i * ' |' + 'Q|' + (config.field_size - i - 1) * ' |')
-            # repr.append((config.field_size * 2 + 1) * '-')
+            repr.append('|' + i * ' |' + 'Q|' + (self.ga_config.field_size - i - 1) * ' |')
+            # repr.append((self.ga_config.field_size * 2 + 1) * '-')
         return '\n'.join(repr)
 
+    @property
+    def fitness(self) -> float:
+        """
+        Fitness of the Organism, computed on first access if it is not known yet
+        :return: float
+        """
+        if self._fitness is None:
+            self.compute_fitness()
+        return self._fitness
+
+    @fitness.setter
+    def fitness(self, value: float):
+        self._fitness = value
+
+    @property
+    def evaluated(self) -> bool:
+        """
+        True if the fitness is already known
+        :return: bool
+        """
+        return self._fitness is not None
+
     def compute_fitness(self):
         """
         Computes and sets(!) the fitness for an Organism
         In particular count the number of times a queen collides with another queen and
         subtract this number from n*(n-1)/2 (the maximal number of collisions)
+        The collisions are counted with diagonal occupancy histograms in O(n),
+        see fitness.pairwise_fitness for the reference implementation comparing every pair of queens.
+        The histograms are kept such that mutations can update the fitness incrementally.
+        If the Organism has a fitness cache, a cached fitness is used instead (without histograms).
 
         :return:
         """
-        fitness = config.field_size * (config.field_size - 1) * 0.5
-        for i, pos1 in enumerate(self.genotype):
-            for j, pos2 in enumerate(self.genotype[i + 1:]):
-                # j+1 is equal to the differences in rows
-                # remember there can only be one queen per row but several per column
-                # compare j+1 with the difference in columns
-                # if equal the queens collides diagonally
-                if abs(pos1 - pos2) == j + 1:
-                    # if equal subtract one from base fitness
-                    fitness -= 1
-                if pos1 == pos2:
-                    # the two queens are in one column
-                    fitness -= 1
-        # add current fitness value from maximal number of collisions
-        # for n queens it is n + (n-1) + (n-2) +... + 1 because all queens can be in one column
-        # and collide with each other
-        self.fitness = fitness
+        if self.fitness_cache is not None:
+            cached_fitness = self.fitness_cache.get(self.genotype)
+            if cached_fitness is not None:
+                self.fitness = cached_fitness
+                self.columns = self.diagonals = self.anti_diagonals = None
+                return
+        self.columns, self.diagonals, self.anti_diagonals = fitness.occupancy(self.genotype)
+        counts = np.concatenate((self.columns, self.diagonals, self.anti_diagonals))
+        self.fitness = fitness.max_fitness(self.ga_config.field_size) - int((counts * (counts - 1)).sum() // 2)
+        if self.fitness_cache is not None:
+            self.fitness_cache.put(self.genotype, self.fitness)
+
+    def _remove_queen(self, row, column):
+        """
+        Removes the queen (row, column) from the occupancy histograms and adds its collisions back to the fitness.
+        :param row: int
+        :param column: int
+        :return:
+        """
+        diagonal = row - column + self.ga_config.field_size - 1
+        anti_diagonal = row + column
+        self.columns[column] -= 1
+        self.diagonals[diagonal] -= 1
+        self.anti_diagonals[anti_diagonal] -= 1
+        # the queen collided with every other queen in its three buckets
+        self.fitness += int(self.columns[column] + self.diagonals[diagonal] + self.anti_diagonals[anti_diagonal])
+
+    def _place_queen(self, row, column):
+        """
+        Adds the queen (row, column) to the occupancy histograms and subtracts its collisions from the fitness.
+        :param row: int
+        :param column: int
+        :return:
+        """
+        diagonal = row - column + self.ga_config.field_size - 1
+        anti_diagonal = row + column
+        # the queen collides with every queen already in its three buckets
+        self.fitness -= int(self.columns[column] + self.diagonals[diagonal] + self.anti_diagonals[anti_diagonal])
+        self.columns[column] += 1
+        self.diagonals[diagonal] += 1
+        self.anti_diagonals[anti_diagonal] += 1
+
+    def update_fitness(self, rows, old_columns):
+        """
+        Updates the fitness incrementally after the queens in the given rows moved,
+        i.e. in O(len(rows)) instead of a full recomputation, if more than incremental_rows queens moved
+        the fitness is recomputed.
+        If ga_config.debug_fitness is True the result is cross-checked against compute_fitness.
+        :param rows: iterable of the changed rows
+        :param old_columns: iterable of the columns of these rows before the change
+        :return:
+        """
+        if self._fitness is None:
+            # not evaluated yet, the fitness will be computed lazily anyway
+            return
+        if self.columns is None or len(rows) > incremental_rows:
+            # no occupancy histograms yet (see from_genotype) or many moved queens, compute them from scratch
+            self.compute_fitness()
+            return
+        for row, column in zip(rows, old_columns):
+            self._remove_queen(row, column)
+        for row in rows:
+            self._place_queen(row, self.genotype[row])
+        if self.ga_config.debug_fitness:
+            self.check_fitness()
+
+    def local_search(self, steps: int):
+        """
+        Improves the Organism with at most the given number of min-conflicts steps (see local_search.min_conflicts),
+        every step is scored in O(1) with the occupancy histograms.
+        :param steps: int
+        :return:
+        """
+        current_fitness = self.fitness
+        self._own_genotype()
+        if self.columns is None:
+            self.columns, self.diagonals, self.anti_diagonals = fitness.occupancy(self.genotype)
+        self.fitness = current_fitness + local_search.min_conflicts(self.genotype, self.diagonals,
+                                                                    self.anti_diagonals, steps, self.rng)
+        if self.ga_config.debug_fitness:
+            self.check_fitness()
+
+    def _set_genotype(self, genotype):
+        """
+        Replaces the genotype by a mutated one and updates the fitness from the rows which actually changed.
+        If no row changed nothing is written and the fitness is kept.
+        The values are written in place, such that a view into a population buffer stays attached,
+        a shared genotype is copied first.
+        :param genotype: np.ndarray, the mutated genotype
+        :return:
+        """
+        rows = np.flatnonzero(genotype != self.genotype)
+        if len(rows):
+            old_columns = self.genotype[rows]
+            self._own_genotype()
+            self.genotype[:] = genotype
+            self.update_fitness(rows, old_columns)
+
+    def check_fitness(self):
+        """
+        Debug check: compares the current (incrementally updated) fitness with a full recomputation.
+        :return:
+        """
+        expected = fitness.compute_fitness(self.genotype, self.ga_config.field_size)
+        if self.fitness != expected:
+            print(f'Incremental fitness {self.fitness} differs from recomputed fitness {expected}! Exit.')
+            sys.exit(1)
 
     ####################################################################################################################
     ## Crossover Methods
@@ -85,28 +281,29 @@ class Organism:
     def crossover(self, parent2, method) -> Tuple:
         """
         Returns crossover children computed by the given method
-        If a random value is higher than the crossover probability the parents will be returned without any crossover
+        If a random value is higher than the crossover probability (copy-on-write) copies of the parents
+        will be returned without any crossover
         :param self: Organism, parent1
         :param parent2: Organism
         :param method: str, can be 'random', 'order_bases', 'pmx'
         :return: two children
         """
         # if random value is higher than crossover probability no children will be produced
-        # the parents will be returned
-        if np.random.uniform() > config.crossover_probability:
-            return self, parent2
+        # copies of the parents will be returned, they share the genotypes until they are mutated
+        if self.rng.random() > self.ga_config.crossover_probability:
+            return self.copy_on_write(), parent2.copy_on_write()
         else:
             # if method is None use the default crossover method
-            method = method if method else config.crossover_method
-            if method is 'order_based':
+            method = method if method else self.ga_config.crossover_method
+            if method == 'order_based':
                 return self.order_based_crossover(parent2)
-            elif method is 'position_based':
+            elif method == 'position_based':
                 return self.position_based_crossover(parent2)
-            elif method is 'pmx':
+            elif method == 'pmx':
                 return self.pmx_crossover(parent2)
-            elif method is 'random':
-                method_list = config.crossover_method_list
-                return self.crossover(parent2, method=method_list[np.random.randint(0, len(method_list))])
+            elif method == 'random':
+                method_list = self.ga_config.crossover_method_list
+                return self.crossover(parent2, method=method_list[self.rng.integers(0, len(method_list))])
 
     def pmx_crossover(self, parent2) -> Tuple:
         """
@@ -115,9 +312,9 @@ class Organism:
         :param parent2: Organism
         :return: two children/Organisms
         """
-        size = config.field_size
-        cxpoint1 = np.random.randint(0, size)
-        cxpoint2 = np.random.randint(0, size)
+        size = self.ga_config.field_size
+        cxpoint1 = self.rng.integers(0, size)
+        cxpoint2 = self.rng.integers(0, size)
 
         if cxpoint2 < cxpoint1:
             cxpoint1, cxpoint2 = cxpoint2, cxpoint1
@@ -158,8 +355,10 @@ class Organism:
                 child2_genotype[ind1] = self.genotype[ind1]
 
         # create organisms and compute fitness
-        child1 = Organism(child1_genotype)
-        child2 = Organism(child2_genotype)
+        child1 = Organism(child1_genotype, self.ga_config, validate=self.ga_config.validate_genotypes,
+                          fitness_cache=self.fitness_cache, rng=self.rng)
+        child2 = Organism(child2_genotype, self.ga_config, validate=self.ga_config.validate_genotypes,
+                          fitness_cache=self.fitness_cache, rng=self.rng)
         return child1, child2
 
     def order_based_crossover(self, parent2) -> Tuple:
@@ -185,13 +384,14 @@ class Organism:
         :param parent2: Organism
         :return: Two children/Organisms
         """
+        size = self.ga_config.field_size
         # determine randomly how many points are chosen
-        number_of_points_to_choose = np.random.randint(1, config.field_size)
+        number_of_points_to_choose = self.rng.integers(1, size)
         # choose the specific points
         # create an array like [0,1,2,3,...,n]
-        points = np.arange(0, config.field_size)
+        points = np.arange(0, size)
         # shuffle it randomly
-        np.random.shuffle(points)
+        self.rng.shuffle(points)
         # cut it to get only the first part
         points = points[0:number_of_points_to_choose]
         # sort
@@ -221,8 +421,10 @@ class Organism:
         child2[order_indices_2] = order_args_2
 
         # create organisms and compute fitness
-        child1 = Organism(child1)
-        child2 = Organism(child2)
+        child1 = Organism(child1, self.ga_config, validate=self.ga_config.validate_genotypes,
+                          fitness_cache=self.fitness_cache, rng=self.rng)
+        child2 = Organism(child2, self.ga_config, validate=self.ga_config.validate_genotypes,
+                          fitness_cache=self.fitness_cache, rng=self.rng)
         return child1, child2
 
     def position_based_crossover(self, parent2) -> Tuple:
@@ -253,13 +455,14 @@ class Organism:
         :param parent2: Organism
         :return: two children/Organisms
         """
+        size = self.ga_config.field_size
         # determine randomly how many points are chosen
-        number_of_points_to_choose = np.random.randint(1, config.field_size)
+        number_of_points_to_choose = self.rng.integers(1, size)
         # choose the specific points
         # create an array like [0,1,2,3,...,n]
-        points = np.arange(0, config.field_size)
+        points = np.arange(0, size)
         # shuffle it randomly
-        np.random.shuffle(points)
+        self.rng.shuffle(points)
         # cut it to get only the first part
         points = points[0:number_of_points_to_choose]
         # sort
@@ -296,8 +499,10 @@ class Organism:
         child2 = np.insert(child2, points_minus_index, position_args_2)
 
         # create organisms and compute fitness
-        child1 = Organism(child1)
-        child2 = Organism(child2)
+        child1 = Organism(child1, self.ga_config, validate=self.ga_config.validate_genotypes,
+                          fitness_cache=self.fitness_cache, rng=self.rng)
+        child2 = Organism(child2, self.ga_config, validate=self.ga_config.validate_genotypes,
+                          fitness_cache=self.fitness_cache, rng=self.rng)
         return child1, child2
 
     ####################################################################################################################
@@ -320,21 +525,21 @@ class Organism:
                         'displacement_inversion', 'random'
         :return:
         """
-        if method is 'exchange':
+        if method == 'exchange':
             self.exchange_mutation()
-        elif method is 'scramble':
+        elif method == 'scramble':
             self.scramble_mutation()
-        elif method is 'displacement':
+        elif method == 'displacement':
             self.displacement_mutation()
-        elif method is 'inversion':
+        elif method == 'inversion':
             self.inversion_mutation()
-        elif method is 'insertion':
+        elif method == 'insertion':
             self.insertion_mutation()
-        elif method is 'displacement_inversion':
+        elif method == 'displacement_inversion':
             self.displacement_inversion_mutation()
-        elif method is 'random':
-            method_list = config.mutation_method_list
-            self.mutate(method=method_list[np.random.randint(0, len(method_list))])
+        elif method == 'random':
+            method_list = self.ga_config.mutation_method_list
+            self.mutate(method=method_list[self.rng.integers(0, len(method_list))])
 
     def exchange_mutation(self):
         """
@@ -343,10 +548,15 @@ class Organism:
         It is possible/allowed that the same rows are selected. Then nothing will happen
         :return:
         """
-        row1 = np.random.randint(0, config.field_size)
-        row2 = np.random.randint(0, config.field_size)
-        self.genotype[row1], self.genotype[row2] = self.genotype[row2], self.genotype[row1]
-        self.compute_fitness()
+        size = self.ga_config.field_size
+        row1 = self.rng.integers(0, size)
+        row2 = self.rng.integers(0, size)
+        if row1 != row2:
+            old_columns = self.genotype[row1], self.genotype[row2]
+            self._own_genotype()
+            self.genotype[row1], self.genotype[row2] = old_columns[1], old_columns[0]
+            # only two queens moved, update the fitness in O(1)
+            self.update_fitness((row1, row2), old_columns)
 
     def scramble_mutation(self):
         """
@@ -354,14 +564,24 @@ class Organism:
         Select two indexes randomly and shuffle/scramble the segment between them
         :return:
         """
+        size = self.ga_config.field_size
         # get two random integers in the range, the lower is the start, the greater is the end of the segment
-        begin_and_end = np.random.randint(0, config.field_size, 2)
+        begin_and_end = self.rng.integers(0, size, 2)
         if begin_and_end[0] != begin_and_end[1]:  # if begin and end are the same there is nothing to do
             # sort such that begin_and_end[0] is the lower one, i.e. the begin of the segment
             begin_and_end.sort()
+            old_columns = self.genotype[begin_and_end[0]: begin_and_end[1]]
+            segment = old_columns.copy()
             # shuffle values in the segment (numpy does it in-place)
-            np.random.shuffle(self.genotype[begin_and_end[0]: begin_and_end[1]])
-            self.compute_fitness()
+            self.rng.shuffle(segment)
+            # the shuffled segment can be the same, then neither the genotype nor the fitness change
+            changed = np.flatnonzero(segment != old_columns)
+            if len(changed):
+                old_columns = old_columns[changed]
+                self._own_genotype()
+                self.genotype[begin_and_end[0]: begin_and_end[1]] = segment
+                # only the changed rows of the segment moved
+                self.update_fitness(begin_and_end[0] + changed, old_columns)
 
     def displacement_mutation(self):
         """
@@ -369,21 +589,20 @@ class Organism:
         Chooses a random segment (i.e. start and end index) and inserts this segment to a random position
         :return:
         """
+        size = self.ga_config.field_size
         # get two random integers in the range, the lower is the start, the greater is the end of the segment
-        begin_and_end = np.random.randint(0, config.field_size, 2)
+        begin_and_end = self.rng.integers(0, size, 2)
         if begin_and_end[0] != begin_and_end[1]:  # if begin and end are the same there is nothing to do
             # sort such that begin_and_end[0] is the lower one, i.e. the begin of the segment
             begin_and_end.sort()
             # get new insertion position
-            new_position = np.random.randint(0, config.field_size - (begin_and_end[1] - begin_and_end[0]))
+            new_position = self.rng.integers(0, size - (begin_and_end[1] - begin_and_end[0]))
             # copy the values from the segment to a temp variable
             vals = self.genotype[begin_and_end[0]: begin_and_end[1]]
             # delete segment
-            self.genotype = np.delete(self.genotype, range(begin_and_end[0], begin_and_end[1]))
+            genotype = np.delete(self.genotype, range(begin_and_end[0], begin_and_end[1]))
             # insert segment from new position
-            self.genotype = np.insert(self.genotype, new_position, vals)
-            # compute new fitness again
-            self.compute_fitness()
+            self._set_genotype(np.insert(genotype, new_position, vals))
 
     def insertion_mutation(self):
         """
@@ -391,12 +610,14 @@ class Organism:
         chooses one row/index randomly, takes the element and inserts it at another random position
         :return:
         """
-        from_index = np.random.randint(0, config.field_size)
-        to_index = np.random.randint(0, config.field_size - 1)  # one less because we temporarily remove one element
-        val = self.genotype[from_index]
-        self.genotype = np.delete(self.genotype, from_index)
-        self.genotype = np.insert(self.genotype, to_index, val)
-        self.compute_fitness()
+        size = self.ga_config.field_size
+        from_index = self.rng.integers(0, size)
+        to_index = self.rng.integers(0, size - 1)  # one less because we temporarily remove one element
+        if from_index != to_index:  # if both are the same the element is inserted where it was
+            val = self.genotype[from_index]
+            genotype = np.delete(self.genotype, from_index)
+            # only the rows between from_index and to_index move
+            self._set_genotype(np.insert(genotype, to_index, val))
 
     def inversion_mutation(self):
         """
@@ -404,18 +625,19 @@ class Organism:
         Invert/flip a randomly chosen segment in the genotype
         :return:
         """
+        size = self.ga_config.field_size
         # get two random integers in the range, the lower is the start, the greater is the end of the segment
-        begin_and_end = np.random.randint(0, config.field_size, 2)
+        begin_and_end = self.rng.integers(0, size, 2)
         if begin_and_end[0] != begin_and_end[1]:  # if begin and end are the same there is nothing to do
             # sort such that begin_and_end[0] is the lower one, i.e. the begin of the segment
             begin_and_end.sort()
-            # concatenate:  part before flipped segment
-            #               flipped/inverted segment
-            #               part after flipped segment
-            self.genotype = np.concatenate((self.genotype[:begin_and_end[0]],
-                                            np.flip(self.genotype[begin_and_end[0]: begin_and_end[1]], axis=0),
-                                            self.genotype[begin_and_end[1]:]))
-            self.compute_fitness()
+            rows = range(begin_and_end[0], begin_and_end[1])
+            old_columns = self.genotype[begin_and_end[0]: begin_and_end[1]].copy()
+            # flip the segment in place
+            self._own_genotype()
+            self.genotype[begin_and_end[0]: begin_and_end[1]] = np.flip(old_columns, axis=0)
+            # only the rows of the segment changed
+            self.update_fitness(rows, old_columns)
 
     def displacement_inversion_mutation(self):
         """
@@ -424,20 +646,19 @@ class Organism:
         inserts this segment to a random position
         :return:
         """
+        size = self.ga_config.field_size
         # get two random integers in the range, the lower is the start, the greater is the end of the segment
-        begin_and_end = np.random.randint(0, config.field_size, 2)
+        begin_and_end = self.rng.integers(0, size, 2)
         if begin_and_end[0] != begin_and_end[1]:  # if begin and end are the same there is nothing to do
             # sort such that begin_and_end[0] is the lower one, i.e. the begin of the segment
             begin_and_end.sort()
             # get new insertion position
-            new_position = np.random.randint(0, config.field_size - (begin_and_end[1] - begin_and_end[0]))
+            new_position = self.rng.integers(0, size - (begin_and_end[1] - begin_and_end[0]))
             # copy the values from the segment to a temp variable, necessary for deleting
             vals = self.genotype[begin_and_end[0]: begin_and_end[1]]
             # flip the temp values, necessary for inserting
             vals_flipped = np.flip(vals, axis=0)
             # delete segment
-            self.genotype = np.delete(self.genotype, range(begin_and_end[0], begin_and_end[1]))
+            genotype = np.delete(self.genotype, range(begin_and_end[0], begin_and_end[1]))
             # insert flipped segment from new position
-            self.genotype = np.insert(self.genotype, new_position, vals_flipped)
-            # compute new fitness again
-            self.compute_fitness()
+            self._set_genotype(np.insert(genotype, new_position, vals_flipped))
@@ -2,19 +2,29 @@ from typing import Tuple
 import numpy as np
 
 from organism import Organism
-import config
+from ga_config import GAConfig, global_rng
+import batch_mutation
+import fitness
+import local_search
 
 
 class Population:
 
-    def __init__(self, population=None, size=None, sort=True):
+    def __init__(self, population=None, size=None, sort=True, ga_config: GAConfig = None, fitness_cache=None,
+                 rng=None):
         """
         Generates a list of a given size of Organisms with the genotype that there is only queen per row and column.
         If no size is given an empty population is created
         :param population: if not None creates a population from a given (sub) population
         :param size: int
         :param sort: if True it will sort the population
+        :param ga_config: GAConfig of the run, if None it is created from config.py
+        :param fitness_cache: optional fitness.FitnessCache of the run
+        :param rng: np.random.Generator of the run, if None a shared global generator is used
         """
+        self.ga_config = ga_config if ga_config is not None else GAConfig.from_config()
+        self.fitness_cache = fitness_cache
+        self.rng = rng if rng is not None else global_rng
         if population:
             self.population = population
             self.sort()
@@ -22,7 +32,9 @@ class Population:
             if size is None:
                 self.population = []
             else:
-                self.population = [Organism() for _ in range(size)]
+                self.population = [Organism(ga_config=self.ga_config, fitness_cache=fitness_cache, rng=self.rng)
+                                   for _ in range(size)]
+                self.evaluate()
                 if sort:
                     self.sort()
         self.accumulated_fitness_values = []
@@ -59,6 +71,42 @@ class Population:
         for arg in args:
             self.population.append(arg)
 
+    def evaluate(self):
+        """
+        Computes the fitness of all not yet evaluated Organisms with one batched call
+        instead of one Organism at a time.
+        Every Organism keeps its row of the batched occupancy histograms, such that its mutations (and the ones of
+        its copy-on-write copies) update the fitness incrementally. With a fitness cache only the fitness is set,
+        the histograms are computed by the first mutation.
+        :return:
+        """
+        unevaluated = [x for x in self.population if not x.evaluated]
+        if unevaluated:
+            genotypes = np.array([x.genotype for x in unevaluated])
+            if self.fitness_cache is not None:
+                fitness_values = self.fitness_cache.compute_fitness_batch(genotypes, self.ga_config.field_size)
+                for organism, fitness_value in zip(unevaluated, fitness_values.tolist()):
+                    organism.fitness = fitness_value
+                return
+            # every Organism owns one row of the histograms, i.e. it can update them in place
+            histograms = fitness.occupancy_batch(genotypes)
+            fitness_values = fitness.compute_fitness_batch(genotypes, self.ga_config.field_size, histograms)
+            for organism, fitness_value, columns, diagonals, anti_diagonals in zip(
+                    unevaluated, fitness_values.tolist(), *histograms):
+                organism.fitness = fitness_value
+                organism.columns, organism.diagonals, organism.anti_diagonals = columns, diagonals, anti_diagonals
+
+    def local_search(self, rows, steps: int):
+        """
+        Improves the Organisms with the given indices by a min-conflicts local search (memetic mode)
+        :param rows: iterable of indices
+        :param steps: maximal number of steps per Organism
+        :return:
+        """
+        for row in rows:
+            self.population[row].local_search(steps)
+        self.accumulated_fitness_computed = False
+
     def sort(self, reverse=True):
         """
         Sort the population by fitness value in descending order (by default)
@@ -66,6 +114,36 @@ class Population:
         """
         self.population = sorted(self.population, key=lambda x: x.fitness, reverse=reverse)
 
+    def fitness_values(self) -> np.ndarray:
+        """
+        Returns the fitness values of all Organisms as one array
+        :return: np.ndarray of shape (size,)
+        """
+        return np.array([x.fitness for x in self.population], dtype=float)
+
+    def genotype_array(self) -> np.ndarray:
+        """
+        Returns the genotypes of all Organisms as one array
+        :return: np.ndarray of shape (size, n)
+        """
+        return np.array([x.genotype for x in self.population])
+
+    def replace_worst(self, number: int):
+        """
+        Replaces the given number of the least fit Organisms by random ones, e.g. immigrants or a restart,
+        and sorts the population again. Assumes the population is sorted descendingly.
+        :param number: int
+        :return:
+        """
+        number = min(number, len(self.population))
+        if number > 0:
+            immigrants = [Organism(ga_config=self.ga_config, fitness_cache=self.fitness_cache, rng=self.rng)
+                          for _ in range(number)]
+            self.population[len(self.population) - number:] = immigrants
+            self.evaluate()
+            self.sort()
+            self.accumulated_fitness_computed = False
+
     def compute_average_fitness(self) -> float:
         """
         Computes the average fitness of the population
@@ -139,15 +217,16 @@ class Population:
         :param method: 'random', 'tournament', 'truncation', 'roulette'
         :return: parent/Organism
         """
-        if method is 'roulette':
+        if method == 'roulette':
             return self.roulette_wheel_selection()
-        elif method is 'truncation':
-            return self.truncation_selection(kwargs.get('truncation_threshold', config.truncation_threshold))
-        elif method is 'tournament':
-            return self.tournament_selection(kwargs.get('competitors', config.tournament_competitors))
-        elif method is 'random':
-            methods_without_random = config.selection_method_list
-            return self.select_parent(method=methods_without_random[np.random.randint(0, len(methods_without_random))])
+        elif method == 'truncation':
+            return self.truncation_selection(
+                kwargs.get('truncation_threshold', self.ga_config.truncation_threshold))
+        elif method == 'tournament':
+            return self.tournament_selection(kwargs.get('competitors', self.ga_config.tournament_competitors))
+        elif method == 'random':
+            methods_without_random = self.ga_config.selection_method_list
+            return self.select_parent(method=methods_without_random[self.rng.integers(0, len(methods_without_random))])
 
     def roulette_wheel_selection(self) -> Organism:
         """
@@ -161,7 +240,7 @@ class Population:
             self.compute_accumulated_fitness_values()
         # choose between 0 and max(accumulated_fitness_values) = last element of list
         # (because they were sorted beforehand)
-        a, b = np.random.randint(0, self.accumulated_fitness_values[-1], 2)
+        a, b = self.rng.integers(0, self.accumulated_fitness_values[-1], 2)
         parent = self.population[
             next(i for i, acc_fitness in enumerate(self.accumulated_fitness_values) if acc_fitness >= a)]
         return parent
@@ -175,7 +254,7 @@ class Population:
         :param truncation_threshold: between 0 and 1, typically between 0.5 and 0.1
         :return: Organism
         """
-        return self[np.random.randint(0, int(self.size() * truncation_threshold))]
+        return self[self.rng.integers(0, int(self.size() * truncation_threshold))]
 
     def tournament_selection(self, competitors=10) -> Organism:
         """
@@ -186,6 +265,365 @@ class Population:
         :return: Organism
         """
         choosen_for_tournament = Population(
-            [self[i] for i in np.random.randint(0, config.number_of_organisms, competitors)])
+            [self[i] for i in self.rng.integers(0, self.ga_config.number_of_organisms, competitors)],
+            ga_config=self.ga_config, fitness_cache=self.fitness_cache, rng=self.rng)
         choosen_for_tournament.sort()
         return choosen_for_tournament[0]
+
+    def select_parents(self, k, method, **kwargs) -> np.ndarray:
+        """
+        Vectorized version of select_parent: draws the indices of k parents with one call.
+        Supports the same methods and arguments as select_parent:
+        'truncation': one random integer array over the fittest x percent
+        'tournament': the fittest of every row of a (k, competitors) sample matrix
+        'roulette': a binary search of k random values in the accumulated fitnesses
+        'random': every parent is drawn with a randomly chosen method from the methods above
+        :param k: number of parents
+        :param method: 'random', 'tournament', 'truncation', 'roulette'
+        :return: np.ndarray of shape (k,), indices of the parents in the population
+        """
+        if method == 'roulette':
+            if not self.accumulated_fitness_computed:
+                self.compute_accumulated_fitness_values()
+            # first index with an accumulated fitness >= the random value, like roulette_wheel_selection
+            return np.searchsorted(self.accumulated_fitness_values,
+                                   self.rng.integers(0, self.accumulated_fitness_values[-1], k))
+        elif method == 'truncation':
+            truncation_threshold = kwargs.get('truncation_threshold', self.ga_config.truncation_threshold)
+            return self.rng.integers(0, int(self.size() * truncation_threshold), k)
+        elif method == 'tournament':
+            competitors = kwargs.get('competitors', self.ga_config.tournament_competitors)
+            chosen_for_tournament = self.rng.integers(0, self.size(), (k, competitors))
+            # argmax returns the first of equally fit competitors, like the stable sort in tournament_selection
+            winners = np.argmax(self.fitness_values()[chosen_for_tournament], axis=1)
+            return chosen_for_tournament[np.arange(k), winners]
+        elif method == 'random':
+            methods_without_random = self.ga_config.selection_method_list
+            methods = self.rng.integers(0, len(methods_without_random), k)
+            parents = np.empty(k, dtype=int)
+            for i, method_without_random in enumerate(methods_without_random):
+                chosen = methods == i
+                parents[chosen] = self.select_parents(int(chosen.sum()), method_without_random, **kwargs)
+            return parents
+
+
+class OrganismView:
+    """
+    Lightweight view of one Organism (row) of an ArrayPopulation.
+    It does not copy anything, genotype and fitness are read from the population's arrays.
+    """
+    __slots__ = ('population', 'index')
+
+    def __init__(self, population, index: int):
+        """
+        :param population: ArrayPopulation
+        :param index: row of the Organism in the population
+        """
+        self.population = population
+        self.index = index
+
+    @property
+    def genotype(self) -> np.ndarray:
+        return self.population.genotypes[self.index]
+
+    # rows of an ArrayPopulation are evaluated before they are handed out
+    evaluated = True
+
+    @property
+    def fitness(self) -> float:
+        return float(self.population.fitness[self.index])
+
+    def __repr__(self):
+        return repr(self.to_organism())
+
+    def to_organism(self) -> Organism:
+        """
+        Copies the viewed row into a standalone Organism (without recomputing the fitness)
+        :return: Organism
+        """
+        return Organism.from_genotype(self.genotype.copy(), self.fitness, self.population.ga_config,
+                                      self.population.fitness_cache, rng=self.population.rng)
+
+    def shared_organism(self) -> Organism:
+        """
+        Organism which reads the viewed row without copying it, the row is copied before the Organism changes it
+        (copy-on-write, see Organism.copy_on_write)
+        :return: Organism
+        """
+        return Organism.from_genotype(self.genotype, self.fitness, self.population.ga_config,
+                                      self.population.fitness_cache, shared=True, rng=self.population.rng)
+
+    def crossover(self, parent2, method) -> Tuple:
+        """
+        Crossover of the viewed Organisms without copying them,
+        the children never change the population's arrays (copy-on-write)
+        :param parent2: OrganismView or Organism
+        :param method: 'pmx', 'order_based', 'position_based' or 'random'
+        :return: two children/Organisms
+        """
+        if isinstance(parent2, OrganismView):
+            parent2 = parent2.shared_organism()
+        return self.shared_organism().crossover(parent2, method=method)
+
+
+class ArrayPopulation(Population):
+
+    def __init__(self, population=None, size=None, sort=True, ga_config: GAConfig = None, fitness_cache=None,
+                 rng=None):
+        """
+        Population backend which stores all genotypes in one contiguous (size, n) integer array
+        and all fitness values in one vector.
+        It has the same interface as Population, single Organisms are accessed via OrganismViews.
+        :param population: if not None creates a population from a given (sub) population,
+                            i.e. an ArrayPopulation or a list of Organisms
+        :param size: int
+        :param sort: if True it will sort the population
+        :param ga_config: GAConfig of the run, if None it is taken from population or created from config.py
+        :param fitness_cache: optional fitness.FitnessCache of the run, if None it is taken from population
+        :param rng: np.random.Generator of the run, if None it is taken from population or the shared global generator
+        """
+        if ga_config is None:
+            ga_config = population.ga_config if isinstance(population, ArrayPopulation) else GAConfig.from_config()
+        if fitness_cache is None and isinstance(population, ArrayPopulation):
+            fitness_cache = population.fitness_cache
+        if rng is None:
+            rng = population.rng if isinstance(population, ArrayPopulation) else global_rng
+        self.ga_config = ga_config
+        self.fitness_cache = fitness_cache
+        self.rng = rng
+        if isinstance(population, ArrayPopulation):
+            self.genotypes = population.genotypes[:population.size()]
+            self.fitness = population.fitness[:population.size()]
+            self._size = population.size()
+            self.sort()
+        elif population:
+            self.genotypes = np.array([x.genotype for x in population])
+            self.fitness = np.array([x.fitness if x.evaluated else np.nan for x in population], dtype=float)
+            self._size = len(population)
+            self.evaluate()
+            self.sort()
+        else:
+            if size is None:
+                size = 0
+            # one random permutation per row
+            self.genotypes = np.argsort(self.rng.random((size, self.ga_config.field_size)), axis=1)
+            self._size = size
+            self.fitness = np.full(size, np.nan)
+            self.evaluate()
+            if sort and size:
+                self.sort()
+        self.accumulated_fitness_values = []
+        self.accumulated_fitness_computed = False
+
+    @classmethod
+    def from_arrays(cls, genotypes: np.ndarray, fitness_values: np.ndarray, ga_config: GAConfig, sort=True,
+                    fitness_cache=None, rng=None):
+        """
+        Creates an ArrayPopulation which takes ownership of the given arrays, nothing is copied or validated.
+        Not yet evaluated rows have to be marked with nan in fitness_values.
+        :param genotypes: np.ndarray of shape (size, n)
+        :param fitness_values: float np.ndarray of shape (size,)
+        :param ga_config: GAConfig of the run
+        :param sort: if True it will evaluate and sort the population
+        :param fitness_cache: optional fitness.FitnessCache of the run
+        :param rng: np.random.Generator of the run, if None the shared global generator is used
+        :return: ArrayPopulation
+        """
+        population = cls.__new__(cls)
+        population.ga_config = ga_config
+        population.fitness_cache = fitness_cache
+        population.rng = rng if rng is not None else global_rng
+        population.genotypes = genotypes
+        population.fitness = fitness_values
+        population._size = len(fitness_values)
+        population.accumulated_fitness_values = []
+        population.accumulated_fitness_computed = False
+        if sort:
+            population.evaluate()
+            population.sort()
+        return population
+
+    def __getitem__(self, item):
+        """
+        Returns a view of the Organism with index item
+        or, if item is a slice, a new ArrayPopulation with a copy of the sliced rows
+        :param item: index or slice
+        :return: OrganismView or ArrayPopulation
+        """
+        if isinstance(item, slice):
+            return ArrayPopulation.from_arrays(self.genotypes[:self._size][item].copy(),
+                                               self.fitness[:self._size][item].copy(), self.ga_config, sort=False,
+                                               fitness_cache=self.fitness_cache, rng=self.rng)
+        if item < 0:
+            item += self._size
+        if not 0 <= item < self._size:
+            raise IndexError('population index out of range')
+        return OrganismView(self, item)
+
+    def size(self) -> int:
+        """
+        Returns the size of the population. Same as len(my_population).
+        :return: number of individuals in the population
+        """
+        return self._size
+
+    def __len__(self) -> int:
+        """
+        Returns the size of the population. Same as self.size().
+        :return: Number of Organisms in the population
+        """
+        return self._size
+
+    def add(self, *args):
+        """
+        Adds arbitrarily many Organisms to the Population, i.e. copies their genotypes and fitness values
+        into the arrays. The arrays grow by doubling their capacity.
+        :param args: one or more Organisms or OrganismViews
+        :return:
+        """
+        needed = self._size + len(args)
+        if needed > len(self.fitness):
+            capacity = max(needed, 2 * len(self.fitness))
+            genotypes = np.empty((capacity, self.ga_config.field_size), dtype=self.genotypes.dtype)
+            genotypes[:self._size] = self.genotypes[:self._size]
+            fitness_values = np.empty(capacity)
+            fitness_values[:self._size] = self.fitness[:self._size]
+            self.genotypes, self.fitness = genotypes, fitness_values
+        for arg in args:
+            self.genotypes[self._size] = arg.genotype
+            # not yet evaluated Organisms are marked with nan and scored by evaluate
+            self.fitness[self._size] = arg.fitness if arg.evaluated else np.nan
+            self._size += 1
+        self.accumulated_fitness_computed = False
+
+    def evaluate(self):
+        """
+        Computes the fitness of all not yet evaluated rows (marked with nan) with one batched call.
+        No occupancy histograms are kept, the rows are mutated in batches and then scored again
+        (see mutate), Organisms taken from the rows compute them on their first mutation.
+        :return:
+        """
+        unevaluated = np.flatnonzero(np.isnan(self.fitness[:self._size]))
+        if len(unevaluated):
+            compute_fitness_batch = (self.fitness_cache.compute_fitness_batch if self.fitness_cache is not None
+                                     else fitness.compute_fitness_batch)
+            self.fitness[unevaluated] = compute_fitness_batch(self.genotypes[unevaluated], self.ga_config.field_size)
+
+    def mutate(self, mask, method):
+        """
+        Mutates the rows selected by mask in place with one batched call, see batch_mutation.mutate_batch.
+        The mutated rows are marked as not evaluated.
+        :param mask: boolean np.ndarray of shape (size,), True for the rows to mutate
+        :param method: see Organism.mutate
+        :return:
+        """
+        rows = batch_mutation.mutate_batch(self.genotypes[:self._size], mask, method, self.ga_config, self.rng)
+        self.fitness[rows] = np.nan
+        self.accumulated_fitness_computed = False
+
+    def local_search(self, rows, steps: int):
+        """
+        Improves the rows with the given indices in place by a min-conflicts local search (memetic mode)
+        :param rows: iterable of indices
+        :param steps: maximal number of steps per row
+        :return:
+        """
+        for row in rows:
+            genotype = self.genotypes[row]
+            columns, diagonals, anti_diagonals = fitness.occupancy(genotype)
+            self.fitness[row] += local_search.min_conflicts(genotype, diagonals, anti_diagonals, steps, self.rng)
+            if self.ga_config.debug_fitness:
+                self[row].to_organism().check_fitness()
+        self.accumulated_fitness_computed = False
+
+    def sort(self, reverse=True):
+        """
+        Sort the population by fitness value in descending order (by default) with a stable argsort
+        :param reverse: If False it is sorted in ascending order)
+        """
+        fitness_values = self.fitness[:self._size]
+        order = np.argsort(-fitness_values if reverse else fitness_values, kind='stable')
+        self.genotypes = self.genotypes[:self._size][order]
+        self.fitness = fitness_values[order]
+        self.accumulated_fitness_computed = False
+
+    def fitness_values(self) -> np.ndarray:
+        """
+        Returns the fitness values of all Organisms, i.e. a view of the fitness vector
+        :return: np.ndarray of shape (size,)
+        """
+        return self.fitness[:self._size]
+
+    def genotype_array(self) -> np.ndarray:
+        """
+        Returns the genotypes of all rows, without copying
+        :return: np.ndarray of shape (size, n)
+        """
+        return self.genotypes[:self._size]
+
+    def replace_worst(self, number: int):
+        """
+        Replaces the given number of the least fit rows by random permutations, e.g. immigrants or a restart,
+        and sorts the population again. Assumes the population is sorted descendingly.
+        :param number: int
+        :return:
+        """
+        number = min(number, self._size)
+        if number > 0:
+            self.genotypes[self._size - number:self._size] = np.argsort(
+                self.rng.random((number, self.ga_config.field_size)), axis=1)
+            self.fitness[self._size - number:self._size] = np.nan
+            self.evaluate()
+            self.sort()
+            self.accumulated_fitness_computed = False
+
+    def compute_average_fitness(self) -> float:
+        """
+        Computes the average fitness of the population
+        :return:
+        """
+        return float(self.fitness[:self._size].sum() / self._size)
+
+    def fittest_organism(self, force_sorting=False) -> OrganismView:
+        """
+        Returns a view of the fittest Organism.
+        Generally it assumes the population is sorted descendingly and it will return the first element in the
+        population.
+        If not one can force_sorting=True and sort the population before returning.
+        :param force_sorting: default False
+        :return: OrganismView
+        """
+        if force_sorting:
+            self.sort()
+        return self[0]
+
+    def compute_accumulated_fitness_values(self):
+        """
+        Computes the accumulated fitness values, see Population.compute_accumulated_fitness_values
+        :return:
+        """
+        self.accumulated_fitness_values = np.cumsum(self.fitness[:self._size])
+        self.accumulated_fitness_computed = True
+
+    def max_fitness_value(self, force_sorting=False) -> float:
+        """
+        Returns only the fitness value of the fittest Organism.
+        Generally it assumes the population is sorted descendingly.
+        If not one can force_sorting=True and sort the population before returning.
+        :param force_sorting: default False
+        :return: float - fitness value
+        """
+        if force_sorting:
+            self.sort()
+        return float(self.fitness[0])
+
+    def roulette_wheel_selection(self) -> OrganismView:
+        """
+        Roulette Wheel Selection, see Population.roulette_wheel_selection
+        The linear scan over the accumulated fitnesses is replaced by a binary search.
+        :return: parent/OrganismView
+        """
+        if not self.accumulated_fitness_computed:
+            self.compute_accumulated_fitness_values()
+        a, b = self.rng.integers(0, self.accumulated_fitness_values[-1], 2)
+        return self[int(np.searchsorted(self.accumulated_fitness_values, a))]
@@ -0,0 +1,76 @@
+from time import perf_counter_ns
+
+# the phases of one generation, see main.evolve and engine.next_generation
+phases = ('population', 'selection', 'crossover', 'mutation', 'fitness', 'local_search', 'sort', 'convergence')
+
+
+class PhaseTimer:
+    """
+    Accumulates the wall time (perf_counter_ns) and the number of calls per phase of the genetic algorithm.
+    Usage:
+        start = timer.start()
+        ...
+        timer.stop('selection', start)
+    """
+    __slots__ = ('times', 'calls')
+
+    def __init__(self):
+        self.times = dict.fromkeys(phases, 0)
+        self.calls = dict.fromkeys(phases, 0)
+
+    @staticmethod
+    def start() -> int:
+        """
+        :return: int, current time in ns
+        """
+        return perf_counter_ns()
+
+    def stop(self, phase: str, start: int):
+        """
+        Adds the time since start to the phase
+        :param phase: one of phases
+        :param start: return value of start()
+        :return:
+        """
+        self.times[phase] += perf_counter_ns() - start
+        self.calls[phase] += 1
+
+    def as_dict(self) -> dict:
+        """
+        Returns the accumulated times (in seconds) and the number of calls per phase
+        :return: dict, phase -> {'time': float, 'calls': int}
+        """
+        return {phase: {'time': self.times[phase] * 1e-9, 'calls': self.calls[phase]} for phase in phases}
+
+
+class NullTimer:
+    """
+    PhaseTimer which does nothing, used if profile_phases is False
+    """
+    __slots__ = ()
+
+    @staticmethod
+    def start() -> int:
+        return 0
+
+    def stop(self, phase: str, start: int):
+        pass
+
+    def as_dict(self) -> dict:
+        return {}
+
+
+NULL_TIMER = NullTimer()
+
+
+def profile_columns(profile: dict) -> dict:
+    """
+    Flattens the dict of PhaseTimer.as_dict into csv columns, e.g. 'selection_time' and 'selection_calls'
+    :param profile: dict, see PhaseTimer.as_dict
+    :return: dict, column -> value
+    """
+    columns = {}
+    for phase, values in profile.items():
+        columns[f'{phase}_time'] = values['time']
+        columns[f'{phase}_calls'] = values['calls']
+    return columns
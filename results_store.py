@@ -0,0 +1,217 @@
+#######################
+#
+#   Append-only store for benchmark results:
+#   every run is appended as one json line (newline-delimited json) as soon as it finished,
+#   the loader returns whole numpy columns and keeps a columnar .npz snapshot of the lines it already parsed,
+#   such that loading a large sweep only parses the lines appended since the last load
+#
+#######################
+
+import csv
+import json
+import os
+
+import numpy as np
+
+# the columns of the legacy benchmark csv files in this order
+legacy_names = ['field_size', 'population_size', 'selection_method', 'tournament_competitors', 'truncation_threshold',
+                'copy_threshold', 'crossover_method', 'crossover_probability', 'mutation_method',
+                'mutation_probability', 'adapt_mutability', 'iterations', 'time', 'fitness', 'average_fitness']
+
+
+def to_columns(rows: list, names=None) -> dict:
+    """
+    Converts rows into numpy columns.
+    Columns with only numbers become numeric arrays (missing values are nan), all other columns string arrays
+    (missing values are empty strings).
+    :param rows: list of dicts, column name -> value
+    :param names: column names in this order, if None the names of all rows in the order of appearance
+    :return: dict, column name -> np.ndarray
+    """
+    if names is None:
+        names = list(dict.fromkeys(name for row in rows for name in row))
+    columns = {}
+    for name in names:
+        values = [row.get(name) for row in rows]
+        if all(value is None or isinstance(value, (bool, int, float)) for value in values):
+            if any(value is None for value in values):
+                columns[name] = np.array([np.nan if value is None else value for value in values], dtype=float)
+            else:
+                columns[name] = np.array(values)
+        else:
+            columns[name] = np.array(['' if value is None else str(value) for value in values])
+    return columns
+
+
+def concatenate_columns(first: dict, second: dict) -> dict:
+    """
+    Appends the columns of second to the columns of first, columns missing on one side are filled
+    with nan or empty strings
+    :param first: dict, column name -> np.ndarray
+    :param second: dict, column name -> np.ndarray
+    :return: dict, column name -> np.ndarray
+    """
+    first_length = len(next(iter(first.values()))) if first else 0
+    second_length = len(next(iter(second.values()))) if second else 0
+    columns = {}
+    for name in list(dict.fromkeys(list(first) + list(second))):
+        parts = []
+        for part, length, other in ((first, first_length, second), (second, second_length, first)):
+            if length == 0:
+                continue
+            if name in part:
+                parts.append(part[name])
+            elif other[name].dtype.kind in 'U':
+                parts.append(np.full(length, ''))
+            else:
+                parts.append(np.full(length, np.nan))
+        columns[name] = np.concatenate(parts)
+    return columns
+
+
+def select_sweep(columns: dict, sweep=None) -> dict:
+    """
+    Selects the rows of one sweep, i.e. with this value in the 'sweep' column
+    :param columns: dict, column name -> np.ndarray
+    :param sweep: sweep id, 'latest' for the sweep of the last row, None for all rows
+    :return: dict, column name -> np.ndarray
+    """
+    if sweep is None or not columns:
+        return columns
+    if 'sweep' not in columns:
+        return {name: values[:0] for name, values in columns.items()}
+    if sweep == 'latest':
+        sweep = columns['sweep'][-1]
+    selected = columns['sweep'] == sweep
+    return {name: values[selected] for name, values in columns.items()}
+
+
+class ResultsStore:
+    """
+    Append-only results file (newline-delimited json) with a columnar snapshot (path + '.npz').
+    Usage:
+        with ResultsStore('results/benchmark.ndjson') as store:
+            store.append({'field_size': 8, 'time': 0.1})
+        columns = ResultsStore('results/benchmark.ndjson').load()
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: path of the ndjson file, it is created on the first append
+        """
+        self.path = path
+        self.snapshot_path = path + '.npz'
+        self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def append(self, row: dict):
+        """
+        Appends one row as a json line and flushes it, i.e. a crash does not lose the finished runs
+        :param row: dict, column name -> value (numbers, strings, bools or None)
+        :return:
+        """
+        if self.file is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.file = open(self.path, 'a')
+        self.file.write(json.dumps(row) + '\n')
+        self.file.flush()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def load(self, snapshot=True, sweep=None) -> dict:
+        """
+        Loads all rows as columns. The rows of the snapshot are loaded in bulk, only the lines appended after it are
+        parsed. If snapshot is True the snapshot is updated afterwards.
+        :param snapshot: bool
+        :param sweep: only the rows of this sweep (see sweep.run_sweep), 'latest' for the last appended sweep,
+                      None for all rows
+        :return: dict, column name -> np.ndarray
+        """
+        columns, offset = self._load_snapshot()
+        if os.path.exists(self.path):
+            with open(self.path, 'rb') as f:
+                f.seek(offset)
+                data = f.read()
+            # only complete lines, a line which is just being written is left for the next load
+            end = data.rfind(b'\n') + 1
+            rows = [json.loads(line) for line in data[:end].splitlines() if line.strip()]
+            if rows:
+                columns = concatenate_columns(columns, to_columns(rows))
+                if snapshot:
+                    np.savez(self.snapshot_path, _offset=np.array(offset + end), **columns)
+        return select_sweep(columns, sweep)
+
+    def _load_snapshot(self):
+        """
+        :return: columns of the snapshot and the byte offset of the first line which is not in the snapshot
+        """
+        if not os.path.exists(self.snapshot_path):
+            return {}, 0
+        with np.load(self.snapshot_path) as snapshot:
+            columns = {name: snapshot[name] for name in snapshot.files if name != '_offset'}
+            offset = int(snapshot['_offset'])
+        if not os.path.exists(self.path) or os.path.getsize(self.path) < offset:
+            # the results file was replaced, the snapshot is outdated
+            return {}, 0
+        return columns, offset
+
+    def export_csv(self, path='csv/benchmark_{field_size}_size.csv', names=None, sweep=None) -> list:
+        """
+        Writes the rows in the legacy layout of the benchmark csv files (pipe-delimited, one header line),
+        existing files are overwritten. Whole numbers are written as ints, e.g. the iterations of a sweep with failed
+        runs (whose nan results turn the column into floats).
+        :param path: path of the csv files, formatted with the columns of every row, e.g. one file per field_size
+        :param names: columns in this order, if None the columns of legacy_names which exist
+        :param sweep: only the rows of this sweep, see load
+        :return: list of the written paths
+        """
+        columns = self.load(sweep=sweep)
+        names = [name for name in legacy_names if name in columns] if names is None else names
+        rows = [dict(zip(columns, (int(value) if isinstance(value, float) and value.is_integer() else value
+                                   for value in values)))
+                for values in zip(*(column.tolist() for column in columns.values()))]
+        files = {}
+        for row in rows:
+            files.setdefault(path.format(**row), []).append(row)
+        for file_path, file_rows in files.items():
+            with open(file_path, 'w', newline='') as f:
+                # the path can be formatted with any column, only the given ones are written
+                writer = csv.DictWriter(f, delimiter='|', fieldnames=names, extrasaction='ignore')
+                writer.writeheader()
+                writer.writerows(file_rows)
+        return list(files)
+
+
+def load_csv(path: str) -> dict:
+    """
+    Loads a legacy benchmark csv file (pipe-delimited) as columns, numeric columns are converted to numbers
+    :param path: path of the csv file
+    :return: dict, column name -> np.ndarray
+    """
+    with open(path, newline='') as f:
+        reader = csv.reader(f, delimiter='|')
+        names = next(reader)
+        values = list(zip(*reader))
+    columns = {}
+    for name, column in zip(names, values or [()] * len(names)):
+        column = np.array(column)
+        for dtype in (int, float):
+            try:
+                column = column.astype(dtype)
+                break
+            except ValueError:
+                pass
+        if column.dtype.kind == 'U' and set(column.tolist()) <= {'True', 'False'}:
+            column = column == 'True'
+        columns[name] = column
+    return columns
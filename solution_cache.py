@@ -0,0 +1,250 @@
+#######################
+#
+#   On-disk cache of solutions per board size with an in-memory LRU in front of it.
+#   Every stored board stands for up to 8 solutions, its rotations and reflections.
+#
+#   usage: python solution_cache.py warmup <directory> <min_field_size> <max_field_size> [solutions] [ga|memetic]
+#          python solution_cache.py get <directory> <field_size>
+#
+#######################
+
+from collections import OrderedDict
+import os
+import sys
+
+import numpy as np
+
+import fitness
+
+header_size = 16  # two int64 at the start of every file: number of stored solutions, next position to write
+
+
+def packed_dtype(field_size: int) -> np.dtype:
+    """
+    Smallest unsigned integer type for the columns of a board
+    :param field_size: int, n
+    :return: np.dtype
+    """
+    if field_size <= 1 << 8:
+        return np.dtype(np.uint8)
+    if field_size <= 1 << 16:
+        return np.dtype(np.uint16)
+    return np.dtype(np.uint32)
+
+
+def symmetries(genotypes: np.ndarray) -> np.ndarray:
+    """
+    Returns the 8 symmetric boards (rotations and reflections) of every board, which are solutions as well
+    if the boards are solutions. A board is the column of the queen in every row, i.e. reflecting at the
+    main diagonal swaps rows and columns (the inverse permutation), the others are combined with reversing
+    the rows and mirroring the columns.
+    :param genotypes: np.ndarray of shape (number of boards, n)
+    :return: np.ndarray of shape (number of boards, 8, n)
+    """
+    size = genotypes.shape[1]
+    transposed = np.argsort(genotypes, axis=1).astype(genotypes.dtype)
+    boards = []
+    for board in (genotypes, transposed):
+        boards += [board, board[:, ::-1], size - 1 - board, size - 1 - board[:, ::-1]]
+    return np.stack(boards, axis=1)
+
+
+def canonical(genotype: np.ndarray) -> np.ndarray:
+    """
+    Lexicographically smallest of the 8 symmetric boards, i.e. the same for all of them
+    :param genotype: np.ndarray of shape (n,)
+    :return: np.ndarray of shape (n,)
+    """
+    boards = symmetries(genotype[np.newaxis])[0]
+    return boards[np.lexsort(boards.T[::-1])[0]]
+
+
+class SolutionCache:
+    """
+    Solutions of the n-queens problem keyed by n, e.g. for repeated requests of the same board size.
+    Every board size has its own file (directory/solutions_<n>.bin) with a header and up to capacity
+    boards packed into the smallest unsigned integer type, which is accessed as a memory-mapped array.
+    Only one board per symmetry class is stored, a lookup serves the stored boards and their rotations and
+    reflections in turn.
+    Eviction: a full file replaces its oldest board, if more than max_field_sizes files exist the least recently
+    used one is deleted. The solutions of the max_size most recently used board sizes are kept in memory.
+    """
+
+    def __init__(self, directory: str, capacity=16, max_field_sizes=1000, max_size=64):
+        """
+        :param directory: directory of the files, it is created if it does not exist
+        :param capacity: maximal number of stored boards per board size
+        :param max_field_sizes: maximal number of board sizes on disk
+        :param max_size: maximal number of board sizes in memory
+        """
+        self.directory = directory
+        self.capacity = capacity
+        self.max_field_sizes = max_field_sizes
+        self.max_size = max_size
+        # field size -> stored boards, least recently used first
+        self.cache = OrderedDict()
+        # field size -> number of the next symmetric board which is served
+        self.served = {}
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, field_size: int) -> str:
+        return os.path.join(self.directory, f'solutions_{field_size}.bin')
+
+    def _open(self, field_size: int, create=False):
+        """
+        Maps the file of a board size into memory
+        :param field_size: int, n
+        :param create: if True a missing file is created with the capacity of the cache
+        :return: header (int64 memmap of [count, position]) and boards (memmap of shape (capacity, n)),
+                 or None, None if the file does not exist
+        """
+        path = self.path(field_size)
+        dtype = packed_dtype(field_size)
+        if not os.path.exists(path):
+            if not create:
+                return None, None
+            with open(path, 'wb') as f:
+                f.truncate(header_size + self.capacity * field_size * dtype.itemsize)
+            self._evict_field_sizes()
+        capacity = (os.path.getsize(path) - header_size) // (field_size * dtype.itemsize)
+        header = np.memmap(path, dtype=np.int64, mode='r+', shape=(2,))
+        boards = np.memmap(path, dtype=dtype, mode='r+', offset=header_size, shape=(capacity, field_size))
+        return header, boards
+
+    def _evict_field_sizes(self):
+        """
+        Deletes the least recently used files if there are more than max_field_sizes
+        :return:
+        """
+        files = [os.path.join(self.directory, name) for name in os.listdir(self.directory)
+                 if name.startswith('solutions_') and name.endswith('.bin')]
+        if len(files) <= self.max_field_sizes:
+            return
+        files.sort(key=os.path.getmtime)
+        for path in files[:len(files) - self.max_field_sizes]:
+            os.remove(path)
+            field_size = int(os.path.basename(path)[len('solutions_'):-len('.bin')])
+            self.cache.pop(field_size, None)
+
+    def boards(self, field_size: int) -> np.ndarray:
+        """
+        Returns the stored boards of a board size, from memory or from the file
+        :param field_size: int, n
+        :return: np.ndarray of shape (number of boards, n), possibly empty
+        """
+        boards = self.cache.get(field_size)
+        if boards is None:
+            header, stored = self._open(field_size)
+            if header is None:
+                boards = np.empty((0, field_size), dtype=packed_dtype(field_size))
+            else:
+                boards = np.array(stored[:min(int(header[0]), len(stored))])
+                del header, stored
+            self._store(field_size, boards)
+        else:
+            self.cache.move_to_end(field_size)
+        if len(boards):
+            # marks the board size as recently used for the eviction of files, also if it was served from memory
+            try:
+                os.utime(self.path(field_size))
+            except FileNotFoundError:
+                # deleted by another cache on the same directory
+                pass
+        return boards
+
+    def _store(self, field_size: int, boards: np.ndarray):
+        self.cache[field_size] = boards
+        self.cache.move_to_end(field_size)
+        if len(self.cache) > self.max_size:
+            self.cache.popitem(last=False)
+
+    def get(self, field_size: int, fixed_queens: dict = None):
+        """
+        Returns a cached solution, the stored boards and their rotations and reflections are served in turn.
+        :param field_size: int, n
+        :param fixed_queens: dict row -> column of queens the solution must contain, None for no constraints
+        :return: np.ndarray (genotype) or None if no cached solution matches
+        """
+        boards = self.boards(field_size)
+        if len(boards) == 0:
+            self.misses += 1
+            return None
+        candidates = symmetries(boards).reshape(-1, field_size)
+        if fixed_queens:
+            rows = np.fromiter(fixed_queens.keys(), dtype=int)
+            columns = np.fromiter(fixed_queens.values(), dtype=int)
+            candidates = candidates[(candidates[:, rows] == columns).all(axis=1)]
+            if len(candidates) == 0:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return candidates[0].astype(int)
+        self.hits += 1
+        served = self.served.get(field_size, 0)
+        self.served[field_size] = served + 1
+        return candidates[served % len(candidates)].astype(int)
+
+    def put(self, genotype: np.ndarray) -> bool:
+        """
+        Stores a solution, if it is not stored yet (including its rotations and reflections).
+        A full file replaces its oldest board.
+        :param genotype: np.ndarray, a solution
+        :return: True if it was stored
+        """
+        field_size = len(genotype)
+        if fitness.compute_fitness(genotype, field_size) != fitness.max_fitness(field_size):
+            raise ValueError('Only solutions can be cached')
+        board = canonical(np.asarray(genotype)).astype(packed_dtype(field_size))
+        boards = self.boards(field_size)
+        if (boards == board).all(axis=1).any():
+            return False
+        header, stored = self._open(field_size, create=True)
+        count, position = int(header[0]), int(header[1])
+        stored[position] = board
+        header[:] = min(count + 1, len(stored)), (position + 1) % len(stored)
+        stored.flush()
+        header.flush()
+        self._store(field_size, np.array(stored[:int(header[0])]))
+        del header, stored
+        return True
+
+
+def warm_up(cache: SolutionCache, field_sizes, solutions=1, strategy='ga', ga_config=None) -> dict:
+    """
+    Fills the cache with solutions of the genetic algorithm
+    :param cache: SolutionCache
+    :param field_sizes: iterable of n
+    :param solutions: number of runs per board size
+    :param strategy: 'ga' or 'memetic', see solver.solve
+    :param ga_config: GAConfig of the runs, if None it is created from config.py
+    :return: dict, n -> number of stored solutions
+    """
+    # imported here, solver imports this module
+    from solver import solve
+    stored = {}
+    for field_size in field_sizes:
+        stored[field_size] = 0
+        for _ in range(solutions):
+            solution = solve(field_size, strategy, ga_config)
+            if solution.fitness == solution.ga_config.max_fitness:
+                stored[field_size] += cache.put(solution.genotype)
+    return stored
+
+
+if __name__ == '__main__':
+    if len(sys.argv) >= 5 and sys.argv[1] == 'warmup':
+        from ga_config import GAConfig
+        result = warm_up(SolutionCache(sys.argv[2]), range(int(sys.argv[3]), int(sys.argv[4]) + 1),
+                         *([int(sys.argv[5])] if len(sys.argv) > 5 else []), *sys.argv[6:7],
+                         ga_config=GAConfig.from_config(verbose=False))
+        for field_size, number in result.items():
+            print(f'{field_size}: {number} new solutions')
+    elif len(sys.argv) == 4 and sys.argv[1] == 'get':
+        print(SolutionCache(sys.argv[2]).get(int(sys.argv[3])))
+    else:
+        print('usage: python solution_cache.py warmup <directory> <min_field_size> <max_field_size> '
+              '[solutions] [ga|memetic]\n'
+              '       python solution_cache.py get <directory> <field_size>')
+        sys.exit(1)
@@ -0,0 +1,88 @@
+#######################
+#
+#   Solver front end: returns a solution of the n-queens problem for a given board size
+#   with the genetic algorithm, the memetic mode or an explicit construction
+#
+#   usage: python solver.py <field_size> [ga|memetic|constructive] [cache_directory]
+#
+#######################
+
+import sys
+
+import numpy as np
+
+from ga_config import GAConfig
+from main import evolve
+from organism import Organism
+from solution_cache import SolutionCache
+
+strategies = ('ga', 'memetic', 'constructive')
+
+
+def construct_solution(field_size: int) -> np.ndarray:
+    """
+    Constructs a solution in O(n) with the explicit placement patterns, which exist for every n except 2 and 3.
+    Counting rows and columns from 1, the queens are placed row by row in the even columns first and then
+    in the odd columns, i.e. 2, 4, 6, ..., 1, 3, 5, ..., with two exceptions:
+        n mod 6 = 2: the odd columns are 3, 1, 7, 9, ..., 5 (swap 1 and 3, move 5 to the end)
+        n mod 6 = 3: the even columns are 4, 6, ..., 2 (move 2 to the end) and
+                     the odd columns are 5, 7, ..., 1, 3 (move 1 and 3 to the end)
+    :param field_size: int, n
+    :return: np.ndarray, genotype (0-based column of the queen in every row)
+    """
+    if field_size in (2, 3) or field_size < 1:
+        raise ValueError(f'There is no solution for field size {field_size}')
+    evens = np.arange(2, field_size + 1, 2)
+    odds = np.arange(1, field_size + 1, 2)
+    if field_size % 6 == 2:
+        odds = np.concatenate(([3, 1], odds[3:], [5]))
+    elif field_size % 6 == 3:
+        evens = np.concatenate((evens[1:], [2]))
+        odds = np.concatenate((odds[2:], [1, 3]))
+    return np.concatenate((evens, odds)) - 1
+
+
+def solve(field_size: int, strategy='constructive', ga_config: GAConfig = None,
+          cache: SolutionCache = None) -> Organism:
+    """
+    Returns a solution for a board of the given size.
+    Possible strategies:    'ga': the genetic algorithm (see main.evolve)
+                            'memetic': the genetic algorithm with min-conflicts local search (see local_search.py)
+                            'constructive': explicit construction in linear time, see construct_solution
+    The genetic algorithm returns the fittest Organism found, which is only a solution
+    if it converged within max_iterations.
+    If a cache is given, cached solutions (or their rotations and reflections) are returned instantly
+    and new solutions are added to it.
+    :param field_size: int, n
+    :param strategy: 'ga', 'memetic' or 'constructive'
+    :param ga_config: GAConfig for the genetic algorithm, if None it is created from config.py
+    :param cache: solution_cache.SolutionCache or None
+    :return: Organism
+    """
+    ga_config = ga_config if ga_config is not None else GAConfig.from_config()
+    ga_config = ga_config._replace(field_size=field_size)
+    if cache is not None:
+        genotype = cache.get(field_size)
+        if genotype is not None:
+            return Organism(genotype, ga_config, validate=ga_config.validate_genotypes)
+        solution = solve(field_size, strategy, ga_config)
+        if solution.fitness == ga_config.max_fitness:
+            cache.put(solution.genotype)
+        return solution
+    if strategy == 'constructive':
+        return Organism(construct_solution(field_size), ga_config, validate=ga_config.validate_genotypes)
+    elif strategy in ('ga', 'memetic'):
+        my_population, iterations = evolve(ga_config._replace(memetic=strategy == 'memetic'))
+        the_winner = my_population.fittest_organism()
+        # a view of an ArrayPopulation is copied into a standalone Organism
+        return the_winner if isinstance(the_winner, Organism) else the_winner.to_organism()
+    raise ValueError(f'Unknown strategy {strategy}, possible strategies: {", ".join(strategies)}')
+
+
+if __name__ == '__main__':
+    if len(sys.argv) not in (2, 3, 4):
+        print('usage: python solver.py <field_size> [ga|memetic|constructive] [cache_directory]')
+        sys.exit(1)
+    solution = solve(int(sys.argv[1]), *sys.argv[2:3], ga_config=GAConfig.from_config(verbose=False),
+                     cache=SolutionCache(sys.argv[3]) if len(sys.argv) == 4 else None)
+    print(solution)
@@ -0,0 +1,257 @@
+#######################
+#
+#   Asyncio solver service for many concurrent requests of small boards:
+#   requests with the same field size which arrive within a short window are coalesced into one batch,
+#   every batch is split over the worker processes, each worker runs one vectorized multi-population run
+#   (one population per request of its chunk)
+#
+#   usage: python solver_service.py <number_of_requests> [<min_field_size> <max_field_size>]
+#
+#######################
+
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import os
+import sys
+import time
+
+import numpy as np
+
+from engine import stacked_next_generation
+from ga_config import GAConfig
+from organism import Organism
+from population import ArrayPopulation
+
+
+def solve_batch(ga_config: GAConfig, budgets: list) -> list:
+    """
+    Runs one population per request as one vectorized multi-population run in the calling (worker) process:
+    the populations are stacked into one array and every generation is one call of
+    engine.stacked_next_generation for all active populations (selection and sorting per population,
+    crossover, mutation and fitness on all rows at once).
+    A population leaves the active set as soon as it found a solution, after its maximal number of generations
+    or at its deadline.
+    :param ga_config: GAConfig of the batch, all requests have its field_size, its seed is the seed of the batch
+    :param budgets: list of (max_iterations, deadline) per request, deadline is a time.time() value or None
+    :return: list of (genotype of the fittest Organism, its fitness, iterations) per request
+    """
+    rng = ga_config.make_rng()
+    number_of_populations = len(budgets)
+    max_fitness = ga_config.max_fitness
+    number_of_copies = int(ga_config.number_of_organisms * ga_config.copy_threshold)
+    number_of_pairs = max(0, -(-(ga_config.number_of_organisms - number_of_copies) // 2))
+    # every generation has number_of_copies + 2 * number_of_pairs Organisms (one more than number_of_organisms
+    # if it is odd), the stacked blocks have this size from the start
+    size = number_of_copies + 2 * number_of_pairs
+    initial = [ArrayPopulation(size=size, sort=True, ga_config=ga_config, rng=rng)
+               for _ in range(number_of_populations)]
+    genotypes = np.stack([population.genotypes for population in initial])
+    fitness_values = np.stack([population.fitness for population in initial])
+    max_iterations = np.array([max_iterations for max_iterations, _ in budgets])
+    deadlines = np.array([np.inf if deadline is None else deadline for _, deadline in budgets])
+    iterations = np.zeros(number_of_populations, dtype=int)
+    mutation_probabilities = np.full(number_of_populations, ga_config.mutation_probability)
+
+    while True:
+        active = np.flatnonzero((fitness_values[:, 0] != max_fitness) & (iterations < max_iterations)
+                                & (time.time() < deadlines))
+        if len(active) == 0:
+            break
+        iterations[active] += 1
+        # if adapt mutability is set to True it will increase the mutation_probability each 500 iterations
+        if ga_config.adapt_mutability:
+            adapt = active[iterations[active] % 500 == 0]
+            mutation_probabilities[adapt] = np.minimum(mutation_probabilities[adapt] + 0.05, 1)
+        genotypes[active], fitness_values[active] = stacked_next_generation(
+            genotypes[active], fitness_values[active], number_of_copies, number_of_pairs,
+            mutation_probabilities[active], ga_config, rng)
+    return [(genotypes[i, 0].copy(), float(fitness_values[i, 0]), int(iterations[i]))
+            for i in range(number_of_populations)]
+
+
+class SolverService:
+    """
+    Solves n-queens requests concurrently in a process pool.
+    Requests with the same field size which arrive within batch_window seconds (or until max_batch_size requests
+    are waiting) are coalesced into one batch, which is split into up to workers chunks, every chunk is solved
+    by one call of solve_batch in a worker process.
+    Every chunk gets its own seed, spawned from the seed of the GAConfig (a random one if it is None), such that
+    repeated requests get different boards.
+    Usage:
+        async with SolverService(GAConfig.from_config(verbose=False)) as service:
+            solutions = await asyncio.gather(*(service.solve(n, timeout=1.0) for n in [8, 8, 10, 12]))
+    """
+
+    def __init__(self, ga_config: GAConfig = None, workers=None, batch_window=0.01, max_batch_size=64):
+        """
+        :param ga_config: GAConfig of all runs (the field size is set per request), if None it is created from
+                          config.py once, i.e. config.py is not read again per request
+        :param workers: number of worker processes, None uses all cores
+        :param batch_window: time in seconds a request waits for other requests of the same field size
+        :param max_batch_size: maximal number of requests per batch
+        """
+        self.ga_config = ga_config if ga_config is not None else GAConfig.from_config()
+        self.workers = workers if workers is not None else os.cpu_count() or 1
+        # the seeds of the chunks are spawned from it
+        self.seed_sequence = np.random.SeedSequence(self.ga_config.seed)
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self.executor = None
+        # field size -> list of (future, max_iterations, deadline) of the waiting requests
+        self.pending = {}
+        self.timers = {}
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.aclose()
+
+    def start(self):
+        """
+        Starts the worker processes
+        :return:
+        """
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+
+    async def aclose(self):
+        """
+        Same as close, but the worker processes are shut down in a thread, i.e. the event loop is not blocked
+        :return:
+        """
+        executor = self.executor
+        self.executor = None
+        self.close()
+        if executor is not None:
+            await asyncio.get_running_loop().run_in_executor(
+                None, lambda: executor.shutdown(wait=True, cancel_futures=True))
+
+    def close(self):
+        """
+        Cancels the waiting requests and shuts the worker processes down, blocks until they exited
+        :return:
+        """
+        for timer in self.timers.values():
+            timer.cancel()
+        self.timers.clear()
+        for requests in self.pending.values():
+            for future, _, _ in requests:
+                future.cancel()
+        self.pending.clear()
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+
+    def submit(self, field_size: int, timeout: float = None, max_iterations: int = None) -> asyncio.Future:
+        """
+        Queues a request, must be called from within the event loop
+        :param field_size: int, n
+        :param timeout: wall-clock budget in seconds, counted from now, None for no limit
+        :param max_iterations: maximal number of generations, if None the max_iterations of the GAConfig
+        :return: asyncio.Future, its result is the fittest Organism found, which is only a solution
+                 if it converged within the budget
+        """
+        if self.executor is None:
+            raise RuntimeError('The SolverService is not started')
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        deadline = time.time() + timeout if timeout is not None else None
+        max_iterations = max_iterations if max_iterations is not None else self.ga_config.max_iterations
+        requests = self.pending.setdefault(field_size, [])
+        requests.append((future, max_iterations, deadline))
+        if len(requests) >= self.max_batch_size:
+            self._dispatch(field_size)
+        elif field_size not in self.timers:
+            self.timers[field_size] = loop.call_later(self.batch_window, self._dispatch, field_size)
+        return future
+
+    async def solve(self, field_size: int, timeout: float = None, max_iterations: int = None) -> Organism:
+        """
+        Solves one request, see submit.
+        The run itself stops at the deadline, if the request is still waiting for a free worker process
+        at that time (plus batch_window as grace period) an asyncio.TimeoutError is raised.
+        :param field_size: int, n
+        :param timeout: wall-clock budget in seconds, None for no limit
+        :param max_iterations: maximal number of generations, if None the max_iterations of the GAConfig
+        :return: Organism
+        """
+        future = self.submit(field_size, timeout, max_iterations)
+        if timeout is None:
+            return await future
+        return await asyncio.wait_for(future, timeout + max(self.batch_window, 0.1))
+
+    def _dispatch(self, field_size: int):
+        """
+        Sends all waiting requests of a field size to the process pool, split into up to workers chunks
+        :param field_size: int, n
+        :return:
+        """
+        timer = self.timers.pop(field_size, None)
+        if timer is not None:
+            timer.cancel()
+        # requests which were cancelled or timed out while waiting are dropped
+        requests = [request for request in self.pending.pop(field_size, []) if not request[0].done()]
+        if not requests:
+            return
+        loop = asyncio.get_running_loop()
+        # at most one chunk per worker process, such that a burst of one field size uses all cores
+        number_of_chunks = min(self.workers, len(requests))
+        for chunk, seed_sequence in zip(np.array_split(np.arange(len(requests)), number_of_chunks),
+                                        self.seed_sequence.spawn(number_of_chunks)):
+            chunk_requests = [requests[i] for i in chunk]
+            ga_config = self.ga_config._replace(field_size=field_size, seed=int(seed_sequence.generate_state(1)[0]))
+            budgets = [(max_iterations, deadline) for _, max_iterations, deadline in chunk_requests]
+            batch = loop.run_in_executor(self.executor, solve_batch, ga_config, budgets)
+            batch.add_done_callback(partial(self._resolve, requests=chunk_requests, ga_config=ga_config))
+
+    @staticmethod
+    def _resolve(batch: asyncio.Future, requests: list, ga_config: GAConfig):
+        """
+        Sets the results (or the exception) of a finished batch on the futures of its requests
+        :param batch: asyncio.Future of solve_batch
+        :param requests: list of (future, max_iterations, deadline)
+        :param ga_config: GAConfig of the batch
+        :return:
+        """
+        if batch.cancelled():
+            for future, _, _ in requests:
+                future.cancel()
+            return
+        exception = batch.exception()
+        for i, (future, _, _) in enumerate(requests):
+            if future.done():
+                continue
+            if exception is not None:
+                future.set_exception(exception)
+            else:
+                genotype, fitness_value, _ = batch.result()[i]
+                future.set_result(Organism.from_genotype(genotype, fitness_value, ga_config))
+
+
+async def serve(number_of_requests: int, field_sizes: list, ga_config: GAConfig) -> list:
+    """
+    Solves random requests concurrently
+    :param number_of_requests: int
+    :param field_sizes: list of n, every request has a random one of them
+    :param ga_config: GAConfig of all runs
+    :return: list of Organisms
+    """
+    sizes = np.random.default_rng().choice(field_sizes, number_of_requests).tolist()
+    async with SolverService(ga_config) as service:
+        return await asyncio.gather(*(service.solve(n) for n in sizes))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) not in (2, 4):
+        print('usage: python solver_service.py <number_of_requests> [<min_field_size> <max_field_size>]')
+        sys.exit(1)
+    low, high = (int(sys.argv[2]), int(sys.argv[3])) if len(sys.argv) == 4 else (8, 30)
+    t0 = time.time()
+    solutions = asyncio.run(serve(int(sys.argv[1]), list(range(low, high + 1)), GAConfig.from_config(verbose=False)))
+    computation_time = time.time() - t0
+    solved = sum(solution.fitness == solution.ga_config.max_fitness for solution in solutions)
+    print(f'Solved {solved} of {len(solutions)} requests in {computation_time:.2f}s '
+          f'({len(solutions) / computation_time:.1f} requests per second)')
@@ -0,0 +1,107 @@
+#######################
+#
+#   Parallel benchmark sweeps: the parameter grid is expanded into independent jobs
+#   which run in a process pool, every job with its own GAConfig and seed (recorded in the results)
+#
+#######################
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import itertools
+import time
+import uuid
+
+import numpy as np
+
+from ga_config import GAConfig
+from profiling import profile_columns
+from results_store import ResultsStore
+
+# the columns of the benchmark results (and csv files) in this order, followed by the results of main
+# and, if profile_phases is True, the time and number of calls per phase
+parameter_names = ['field_size', 'number_of_organisms', 'selection_method', 'tournament_competitors',
+                   'truncation_threshold', 'copy_threshold', 'crossover_method', 'crossover_probability',
+                   'mutation_method', 'mutation_probability', 'adapt_mutability', 'seed']
+csv_names = {'number_of_organisms': 'population_size'}
+result_names = ['iterations', 'time', 'fitness', 'average_fitness']
+
+
+def expand_grid(grid: dict, runs: int) -> list:
+    """
+    Expands a parameter grid into one job per parameter combination and run
+    :param grid: dict, config name -> list of values, e.g. {'field_size': [8, 15], 'selection_method': ['roulette']}
+    :param runs: number of runs per parameter combination
+    :return: list of dicts, config name -> value
+    """
+    names = list(grid.keys())
+    return [dict(zip(names, values))
+            for values in itertools.product(*(grid[name] for name in names))
+            for _ in range(runs)]
+
+
+def parameter_row(ga_config: GAConfig) -> dict:
+    """
+    :param ga_config: GAConfig of a job
+    :return: dict, the parameter columns of its row
+    """
+    return {csv_names.get(name, name): getattr(ga_config, name) for name in parameter_names}
+
+
+def failed_row(ga_config: GAConfig, exception: Exception) -> dict:
+    """
+    Row of a job which raised an exception, its results are nan (i.e. ignored by aggregate.group_by)
+    :param ga_config: GAConfig of the job
+    :param exception: the exception of the job
+    :return: dict, one row of the benchmark csv
+    """
+    row = parameter_row(ga_config)
+    row.update(dict.fromkeys(result_names, float('nan')))
+    row['error'] = f'{type(exception).__name__}: {exception}'
+    return row
+
+
+def run_job(ga_config: GAConfig) -> dict:
+    """
+    Runs main.main for one job in a worker process
+    :param ga_config: GAConfig of the job, including its seed
+    :return: dict, one row of the benchmark csv
+    """
+    from main import main
+
+    row = parameter_row(ga_config)
+    *results, profile = main(ga_config)
+    row.update(zip(result_names, results))
+    row.update(profile_columns(profile))
+    return row
+
+
+def run_sweep(grid: dict, runs: int, path='results/benchmark_size.ndjson', workers=None, seed=None) -> str:
+    """
+    Runs all jobs of a parameter grid in a process pool.
+    Every finished job is appended (and flushed) to the results store immediately, i.e. nothing is buffered
+    and a crash does not lose the finished runs. A job which raises an exception is recorded as failed row
+    (see failed_row) and the sweep continues. The store keeps the rows of all sweeps, every row has the
+    id of its sweep in the 'sweep' column. Use ResultsStore(path).export_csv(sweep=...) for the legacy csv files.
+    :param grid: see expand_grid
+    :param runs: number of runs per parameter combination
+    :param path: path of the results store (newline-delimited json), see results_store.ResultsStore
+    :param workers: number of worker processes, None uses all cores
+    :param seed: seed for the seeds of the jobs, None for a random one
+    :return: str, id of the sweep (start time and a random suffix)
+    """
+    sweep = f'{time.strftime("%Y%m%dT%H%M%S")}-{uuid.uuid4().hex[:8]}'
+    jobs = expand_grid(grid, runs)
+    # every job gets its own seed (unless the grid contains seeds), it is written to the results
+    # such that every run can be replayed, e.g. main(GAConfig.from_config(seed=...))
+    seeds = np.random.SeedSequence(seed).generate_state(len(jobs))
+    jobs = [GAConfig.from_config(verbose=False, **{'seed': int(job_seed), **job}) for job, job_seed in zip(jobs, seeds)]
+    with ResultsStore(path) as store, ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(run_job, job): job for job in jobs}
+        for counter, future in enumerate(as_completed(futures), 1):
+            try:
+                row = future.result()
+            except Exception as exception:
+                row = failed_row(futures[future], exception)
+                print(f'Job failed: {row["error"]}')
+            store.append({'sweep': sweep, **row})
+            print(f'{counter}/{len(jobs)}')
+    return sweep
@@ -0,0 +1,227 @@
+import json
+import os
+import sys
+from time import perf_counter_ns
+
+import numpy as np
+
+from convergence import diversity
+from ga_config import GAConfig
+
+# the values recorded per generation, see Telemetry.record
+fields = ('generation', 'best_fitness', 'mean_fitness', 'diversity', 'mutation_probability', 'time')
+
+
+class Telemetry:
+    """
+    Records best and mean fitness, diversity (see convergence.diversity), the current mutation_probability and the
+    wall time of every generation of a run and passes them to sinks.
+    The records are buffered in arrays and emitted in batches, i.e. a sink is called with a dict field -> np.ndarray
+    of several generations, once the buffer is full, flush_interval seconds passed or the run finished.
+    Any callable can be a sink, e.g. RingBuffer, JsonLinesWriter, ConsolePrinter or a user defined callback.
+    Usage:
+        telemetry = Telemetry([RingBuffer(1000), ConsolePrinter()])
+        population, iterations = main.evolve(ga_config, telemetry=telemetry)
+        telemetry.close()
+    """
+
+    def __init__(self, sinks: list, batch_size=100, flush_interval=1.0, diversity_interval=10):
+        """
+        :param sinks: list of callables, called with a dict field -> np.ndarray of shape (number of generations,)
+        :param batch_size: maximal number of generations per batch
+        :param flush_interval: maximal time in seconds between two batches
+        :param diversity_interval: the diversity is only computed every diversity_interval generations
+                                   (it hashes the whole population), the other generations record nan
+        """
+        self.sinks = list(sinks)
+        self.batch_size = batch_size
+        self.flush_interval_ns = int(flush_interval * 1e9)
+        self.diversity_interval = diversity_interval
+        self.buffer = {field: np.empty(batch_size, dtype=int if field == 'generation' else float)
+                       for field in fields}
+        self.length = 0
+        self.last_time = None
+        self.last_flush = None
+
+    @classmethod
+    def from_config(cls, ga_config: GAConfig):
+        """
+        Creates the telemetry configured by telemetry, telemetry_path and telemetry_batch_size
+        (a RingBuffer is only useful if the Telemetry is created by the caller, see main.main)
+        :param ga_config: GAConfig of the run
+        :return: Telemetry or NULL_TELEMETRY if telemetry is empty
+        """
+        if not ga_config.telemetry:
+            return NULL_TELEMETRY
+        sinks = []
+        for sink in ga_config.telemetry:
+            if sink == 'jsonl':
+                sinks.append(JsonLinesWriter(ga_config.telemetry_path))
+            elif sink == 'console':
+                sinks.append(ConsolePrinter())
+            else:
+                raise ValueError(f'Unknown telemetry sink {sink}')
+        return cls(sinks, batch_size=ga_config.telemetry_batch_size)
+
+    def start(self):
+        """
+        Starts the time measurement, called after the initial population was created
+        :return:
+        """
+        self.last_time = self.last_flush = perf_counter_ns()
+
+    def record(self, generation: int, population, mutation_probability: float):
+        """
+        Records the (sorted) population of a finished generation
+        :param generation: int, number of the generation
+        :param population: Population or ArrayPopulation, sorted
+        :param mutation_probability: float, mutation probability of the generation
+        :return:
+        """
+        now = perf_counter_ns()
+        if self.last_time is None:
+            self.last_time = self.last_flush = now
+        buffer, index = self.buffer, self.length
+        buffer['generation'][index] = generation
+        buffer['best_fitness'][index] = population.max_fitness_value()
+        buffer['mean_fitness'][index] = population.compute_average_fitness()
+        buffer['diversity'][index] = (diversity(population.genotype_array())
+                                      if generation % self.diversity_interval == 0 else np.nan)
+        buffer['mutation_probability'][index] = mutation_probability
+        buffer['time'][index] = (now - self.last_time) * 1e-9
+        self.last_time = now
+        self.length += 1
+        if self.length == self.batch_size or now - self.last_flush >= self.flush_interval_ns:
+            self.flush()
+
+    def flush(self):
+        """
+        Emits the buffered records to all sinks
+        :return:
+        """
+        self.last_flush = perf_counter_ns()
+        if self.length == 0:
+            return
+        # copies, the buffer is reused for the next batch
+        batch = {field: values[:self.length].copy() for field, values in self.buffer.items()}
+        self.length = 0
+        for sink in self.sinks:
+            sink(batch)
+
+    def close(self):
+        """
+        Emits the remaining records and closes all sinks which have a close method
+        :return:
+        """
+        self.flush()
+        for sink in self.sinks:
+            if hasattr(sink, 'close'):
+                sink.close()
+
+
+class NullTelemetry:
+    """
+    Telemetry which does nothing, used if telemetry is disabled
+    """
+    __slots__ = ()
+
+    def start(self):
+        pass
+
+    def record(self, generation: int, population, mutation_probability: float):
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+NULL_TELEMETRY = NullTelemetry()
+
+
+class RingBuffer:
+    """
+    Sink which keeps the records of the last capacity generations in memory
+    """
+
+    def __init__(self, capacity=1000):
+        """
+        :param capacity: maximal number of generations
+        """
+        self.capacity = capacity
+        self.buffer = {field: np.empty(capacity, dtype=int if field == 'generation' else float) for field in fields}
+        # number of records written so far, the next record is written to position % capacity
+        self.position = 0
+
+    def __call__(self, batch: dict):
+        length = len(batch['generation'])
+        # only the last capacity records of the batch survive
+        skip = max(0, length - self.capacity)
+        indices = (self.position + skip + np.arange(length - skip)) % self.capacity
+        for field, values in batch.items():
+            self.buffer[field][indices] = values[skip:]
+        self.position += length
+
+    def __len__(self):
+        return min(self.position, self.capacity)
+
+    def records(self) -> dict:
+        """
+        Returns the kept records, oldest first
+        :return: dict, field -> np.ndarray
+        """
+        indices = (self.position - len(self) + np.arange(len(self))) % self.capacity
+        return {field: values[indices] for field, values in self.buffer.items()}
+
+
+class JsonLinesWriter:
+    """
+    Sink which appends one json line per generation to a file, every batch is written with one call and flushed
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: path of the file, the directory is created if it does not exist
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = open(path, 'a')
+
+    def __call__(self, batch: dict):
+        columns = [[None if value != value else value for value in batch[field].tolist()] for field in fields]
+        self.file.write(''.join(json.dumps(dict(zip(fields, row))) + '\n' for row in zip(*columns)))
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class ConsolePrinter:
+    """
+    Sink which prints the last generation of a batch, at most once every interval seconds
+    """
+
+    def __init__(self, interval=1.0, file=sys.stdout):
+        """
+        :param interval: minimal time in seconds between two lines
+        :param file: stream the lines are written to
+        """
+        self.interval_ns = int(interval * 1e9)
+        self.file = file
+        self.last_print = None
+
+    def __call__(self, batch: dict):
+        now = perf_counter_ns()
+        if self.last_print is not None and now - self.last_print < self.interval_ns:
+            return
+        self.last_print = now
+        # the diversity of the last generation where it was computed
+        diversities = batch['diversity'][~np.isnan(batch['diversity'])]
+        diversity_text = f'{diversities[-1]:.3f}' if len(diversities) else '-'
+        print(f'generation {batch["generation"][-1]}: best fitness {batch["best_fitness"][-1]}, '
+              f'mean fitness {batch["mean_fitness"][-1]:.2f}, diversity {diversity_text}, '
+              f'mutation probability {batch["mutation_probability"][-1]:.2f}, '
+              f'{batch["time"].mean() * 1e3:.3f}ms per generation', file=self.file)
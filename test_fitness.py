@@ -0,0 +1,96 @@
+#######################
+#
+#   Checks the O(n) fitness functions and the incremental fitness updates of an Organism
+#   against the O(n²) reference implementation fitness.pairwise_fitness
+#
+#   usage: python -m pytest -q
+#
+#######################
+
+import numpy as np
+import pytest
+
+import fitness
+from ga_config import GAConfig
+from organism import Organism
+
+field_sizes = [1, 2, 3, 4, 8, 13, 40]
+number_of_genotypes = 50
+
+
+def random_genotypes(field_size: int, permutations: bool, rng: np.random.Generator) -> np.ndarray:
+    """
+    :param field_size: int, n
+    :param permutations: if True every row is a permutation, otherwise the columns are drawn independently,
+                         i.e. several queens can share a column
+    :param rng: np.random.Generator
+    :return: np.ndarray of shape (number_of_genotypes, n)
+    """
+    if permutations:
+        return np.argsort(rng.random((number_of_genotypes, field_size)), axis=1)
+    return rng.integers(0, field_size, (number_of_genotypes, field_size))
+
+
+@pytest.mark.parametrize('permutations', [True, False])
+@pytest.mark.parametrize('field_size', field_sizes)
+def test_compute_fitness(field_size, permutations):
+    rng = np.random.default_rng(field_size)
+    for genotype in random_genotypes(field_size, permutations, rng):
+        assert fitness.compute_fitness(genotype) == fitness.pairwise_fitness(genotype)
+        assert fitness.compute_fitness(genotype.tolist()) == fitness.pairwise_fitness(genotype.tolist())
+
+
+@pytest.mark.parametrize('permutations', [True, False])
+@pytest.mark.parametrize('field_size', field_sizes)
+def test_compute_fitness_batch(field_size, permutations):
+    rng = np.random.default_rng(field_size)
+    genotypes = random_genotypes(field_size, permutations, rng)
+    expected = [fitness.pairwise_fitness(genotype) for genotype in genotypes]
+    assert fitness.compute_fitness_batch(genotypes).tolist() == expected
+    assert fitness.FitnessCache(8).compute_fitness_batch(genotypes).tolist() == expected
+
+
+@pytest.mark.parametrize('field_size', [1, 2, 3])
+def test_all_genotypes_of_small_boards(field_size):
+    # every board with one queen per row, including all non-permutations
+    genotypes = np.stack(np.meshgrid(*[np.arange(field_size)] * field_size, indexing='ij'), -1)
+    genotypes = genotypes.reshape(-1, field_size)
+    expected = [fitness.pairwise_fitness(genotype) for genotype in genotypes]
+    assert [fitness.compute_fitness(genotype) for genotype in genotypes] == expected
+    assert fitness.compute_fitness_batch(genotypes).tolist() == expected
+
+
+@pytest.mark.parametrize('permutations', [True, False])
+@pytest.mark.parametrize('field_size', field_sizes)
+def test_update_fitness(field_size, permutations):
+    rng = np.random.default_rng(field_size)
+    ga_config = GAConfig.from_config(field_size=field_size, debug_fitness=False)
+    for genotype in random_genotypes(field_size, permutations, rng):
+        organism = Organism(genotype, ga_config, validate=False, rng=rng)
+        organism.compute_fitness()
+        for _ in range(10):
+            # moves a few queens at once, the histograms are updated incrementally
+            mutated = organism.genotype.copy()
+            rows = rng.choice(field_size, rng.integers(1, field_size + 1), replace=False)
+            if permutations:
+                mutated[rows] = mutated[rng.permutation(rows)]
+            else:
+                mutated[rows] = rng.integers(0, field_size, len(rows))
+            organism._set_genotype(mutated)
+            assert organism.columns is not None
+            assert organism.fitness == fitness.pairwise_fitness(organism.genotype)
+
+
+@pytest.mark.parametrize('method', ['exchange', 'scramble', 'displacement', 'insertion', 'inversion',
+                                    'displacement_inversion'])
+# a single queen has nothing to mutate
+@pytest.mark.parametrize('field_size', field_sizes[1:])
+def test_mutations(field_size, method):
+    rng = np.random.default_rng(field_size)
+    ga_config = GAConfig.from_config(field_size=field_size, debug_fitness=False)
+    for genotype in random_genotypes(field_size, True, rng):
+        organism = Organism(genotype, ga_config, validate=False, rng=rng)
+        organism.compute_fitness()
+        for _ in range(10):
+            organism.mutate(method)
+            assert organism.fitness == fitness.pairwise_fitness(organism.genotype)